@@ -5,12 +5,21 @@
 # Uses bcrypt for password hashing and python-jose for JWT operations.
 # =============================================================================
 
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union
 import bcrypt
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
+from observability import metrics
 from app.config import settings
+from app.revocation import revocation_list
 
 
 # =============================================================================
@@ -32,6 +41,7 @@ class PasswordManager:
     """
     
     @staticmethod
+    @metrics.timed(metrics.PASSWORD_HASH_DURATION, "hash")
     def hash_password(password: str) -> str:
         """
         Hash a password using bcrypt.
@@ -48,12 +58,13 @@ class PasswordManager:
         """
         # Encode and truncate to bcrypt's 72-byte limit
         password_bytes = password[:72].encode('utf-8')
-        # Generate salt and hash (cost factor 12 by default)
-        salt = bcrypt.gensalt(rounds=12)
+        # Generate salt and hash with the configured (calibrated) cost
+        salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
         hashed = bcrypt.hashpw(password_bytes, salt)
         return hashed.decode('utf-8')
     
     @staticmethod
+    @metrics.timed(metrics.PASSWORD_HASH_DURATION, "verify")
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """
         Verify a password against its hash.
@@ -75,6 +86,187 @@ class PasswordManager:
         except Exception:
             # Return False for any error (invalid hash format, etc.)
             return False
+    
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """
+        Check whether a hash was made with a cost other than bcrypt_rounds.
+        
+        Older rows carry whatever cost was current when they were written
+        (the legacy hashing.Hash.bcrypt used the library default), so call
+        this after a successful verify and upgrade the stored hash.
+        
+        Args:
+            hashed_password: Bcrypt hash ("$2b$<cost>$<salt+digest>")
+            
+        Returns:
+            bool: True if the hash should be replaced
+        """
+        try:
+            return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+        except (IndexError, ValueError):
+            return False
+    
+    @staticmethod
+    def calibrate_rounds(
+        budget_ms: float,
+        min_rounds: int = 10,
+        max_rounds: int = 16,
+        samples: int = 3
+    ) -> tuple[int, dict]:
+        """
+        Benchmark bcrypt on this host and pick the highest cost within budget.
+        
+        Each cost is timed ``samples`` times and the median is used. Timing
+        stops at the first cost over budget, since every step doubles the work.
+        
+        Args:
+            budget_ms: Maximum acceptable time for one hash, in milliseconds
+            min_rounds: Lowest cost ever returned, even if over budget
+            max_rounds: Highest cost tried
+            samples: Hashes timed per cost
+            
+        Returns:
+            tuple: (chosen rounds, {rounds: median milliseconds})
+        """
+        password = b"calibration-password"
+        timings = {}
+        chosen = min_rounds
+        for rounds in range(min_rounds, max_rounds + 1):
+            runs = []
+            for _ in range(samples):
+                salt = bcrypt.gensalt(rounds=rounds)
+                started = time.perf_counter()
+                bcrypt.hashpw(password, salt)
+                runs.append((time.perf_counter() - started) * 1000)
+            timings[rounds] = round(statistics.median(runs), 1)
+            if timings[rounds] > budget_ms:
+                break
+            chosen = rounds
+        return chosen, timings
+
+
+# =============================================================================
+# Off-Loop Password Hashing Service
+# =============================================================================
+# A bcrypt call costs ~250 ms of CPU. Run inline in an async handler it
+# freezes every other request on the worker, so handlers await the
+# PasswordHasher instead: bcrypt runs on a small dedicated thread pool
+# (bcrypt releases the GIL while hashing), and at most
+# hash_workers + hash_queue_size jobs are admitted at once. Beyond that the
+# request fails fast with 503 + Retry-After instead of queueing unboundedly.
+# =============================================================================
+
+class PasswordHasher:
+    """
+    Bounded, non-blocking front end for PasswordManager.
+    
+    Admission bookkeeping only happens on the event loop thread, so the
+    counters need no locking.
+    
+    Usage:
+        hashed = await password_hasher.hash(password)
+        ok = await password_hasher.verify(password, user.password)
+    """
+    
+    # Recent samples kept for latency percentiles
+    SAMPLE_SIZE = 1024
+    
+    def __init__(self, workers: int, queue_size: int, retry_after_seconds: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after_seconds = retry_after_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._hash_seconds = deque(maxlen=self.SAMPLE_SIZE)
+        self._wait_seconds = deque(maxlen=self.SAMPLE_SIZE)
+    
+    @staticmethod
+    def _timed(fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        return started, time.perf_counter(), result
+    
+    def _release(self):
+        self._pending -= 1
+    
+    async def _run(self, fn, *args):
+        if self._pending >= self.workers + self.queue_size:
+            self._rejected += 1
+            metrics.PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        job = self._executor.submit(self._timed, fn, *args)
+        self._pending += 1
+        # Release the slot when the bcrypt job itself ends, not when this
+        # coroutine does: a cancelled request leaves the thread running.
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        started, finished, result = await asyncio.wrap_future(job, loop=loop)
+        self._completed += 1
+        self._wait_seconds.append(started - submitted)
+        self._hash_seconds.append(finished - started)
+        return result
+    
+    async def hash(self, password: str) -> str:
+        """Hash a password on the bcrypt pool."""
+        return await self._run(PasswordManager.hash_password, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash on the bcrypt pool."""
+        return await self._run(PasswordManager.verify_password, plain_password, hashed_password)
+    
+    @staticmethod
+    def _percentiles(samples) -> dict:
+        ordered = sorted(samples)
+        if not ordered:
+            return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+        
+        def pick(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        
+        return {
+            "p50_ms": round(pick(0.50) * 1000, 2),
+            "p95_ms": round(pick(0.95) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+    
+    def metrics(self) -> dict:
+        """
+        Pool size, queue depth and latency of recent hash jobs.
+        
+        ``hash`` is time spent in bcrypt, ``wait`` is time spent queued
+        for a free thread.
+        """
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": min(self._pending, self.workers),
+            "queued": max(0, self._pending - self.workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "hash": self._percentiles(self._hash_seconds),
+            "wait": self._percentiles(self._wait_seconds),
+        }
+    
+    def shutdown(self):
+        """Stop the pool; queued jobs are dropped."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.hash_workers,
+    queue_size=settings.hash_queue_size,
+    retry_after_seconds=settings.hash_retry_after_seconds,
+)
+metrics.PASSWORD_HASH_IN_FLIGHT.set_function(lambda: password_hasher.metrics()["in_flight"])
+metrics.PASSWORD_HASH_QUEUED.set_function(lambda: password_hasher.metrics()["queued"])
 
 
 # =============================================================================
@@ -99,6 +291,7 @@ class TokenManager:
     """
     
     @staticmethod
+    @metrics.timed(metrics.JWT_DURATION, "encode")
     def create_access_token(
         data: dict, 
         expires_delta: Optional[timedelta] = None
@@ -129,10 +322,12 @@ class TokenManager:
                 minutes=settings.access_token_expire_minutes
             )
         
-        # Add standard JWT claims
+        # Add standard JWT claims; jti makes the token individually revocable
         to_encode.update({
             "exp": expire,
-            "iat": datetime.now(timezone.utc),
+            # Float seconds: revocation cutoffs compare at sub-second precision
+            "iat": datetime.now(timezone.utc).timestamp(),
+            "jti": uuid.uuid4().hex,
             "type": "access"
         })
         
@@ -145,6 +340,7 @@ class TokenManager:
         return encoded_jwt
     
     @staticmethod
+    @metrics.timed(metrics.JWT_DURATION, "encode")
     def create_refresh_token(
         data: dict, 
         expires_delta: Optional[timedelta] = None
@@ -173,7 +369,9 @@ class TokenManager:
         
         to_encode.update({
             "exp": expire,
-            "iat": datetime.now(timezone.utc),
+            # Float seconds: revocation cutoffs compare at sub-second precision
+            "iat": datetime.now(timezone.utc).timestamp(),
+            "jti": uuid.uuid4().hex,
             "type": "refresh"
         })
         
@@ -185,6 +383,7 @@ class TokenManager:
         return encoded_jwt
     
     @staticmethod
+    @metrics.timed(metrics.JWT_DURATION, "decode")
     def decode_token(token: str, token_type: str = "access") -> dict:
         """
         Decode and validate a JWT token.
@@ -197,7 +396,7 @@ class TokenManager:
             dict: Decoded token payload
             
         Raises:
-            HTTPException: If token is invalid, expired, or wrong type
+            HTTPException: If token is invalid, expired, revoked, or wrong type
         """
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -225,6 +424,14 @@ class TokenManager:
             if payload.get("sub") is None:
                 raise credentials_exception
             
+            # Reject revoked tokens (in-memory lookup, no DB query)
+            if revocation_list.is_revoked(payload):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token has been revoked",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            
             return payload
             
         except JWTError as e:
@@ -238,26 +445,23 @@ class TokenManager:
             raise credentials_exception
     
     @staticmethod
-    def verify_token(token: str) -> Union[dict, None]:
+    def verify_token(token: str, token_type: str = "access") -> Union[dict, None]:
         """
         Verify a token without raising exceptions.
         
         Useful for optional authentication or checking token validity.
+        Applies the same checks as decode_token, including revocation.
         
         Args:
             token: JWT token string to verify
+            token_type: Expected token type ('access' or 'refresh')
             
         Returns:
             dict: Decoded payload if valid, None if invalid
         """
         try:
-            payload = jwt.decode(
-                token, 
-                settings.secret_key, 
-                algorithms=[settings.algorithm]
-            )
-            return payload
-        except JWTError:
+            return TokenManager.decode_token(token, token_type=token_type)
+        except HTTPException:
             return None
 
 
@@ -293,3 +497,31 @@ def decode_access_token(token: str) -> dict:
 def decode_refresh_token(token: str) -> dict:
     """Decode and validate a refresh token."""
     return TokenManager.decode_token(token, token_type="refresh")
+
+
+# =============================================================================
+# bcrypt Cost Calibration
+# =============================================================================
+#   python -m app.auth --calibrate                  # uses hash_latency_budget_ms
+#   python -m app.auth --calibrate --budget-ms 400
+# Prints the BCRYPT_ROUNDS value to put in .env; existing hashes are
+# upgraded to it on each user's next successful login.
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password hashing maintenance")
+    parser.add_argument("--calibrate", action="store_true", help="pick bcrypt_rounds for this host")
+    parser.add_argument("--budget-ms", type=float, default=settings.hash_latency_budget_ms,
+                        help="latency budget for one hash (default: hash_latency_budget_ms)")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        rounds, timings = PasswordManager.calibrate_rounds(args.budget_ms)
+        for cost, ms in timings.items():
+            print(f"  cost {cost:>2}: {ms:>8.1f} ms")
+        if timings[rounds] > args.budget_ms:
+            print(f"Even cost {rounds} exceeds the {args.budget_ms:g} ms budget; using the minimum")
+        print(f"Current: {settings.bcrypt_rounds}")
+        print(f"BCRYPT_ROUNDS={rounds}")
+    else:
+        parser.print_help()
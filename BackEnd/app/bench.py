@@ -0,0 +1,114 @@
+# =============================================================================
+# Concurrency Benchmark
+# =============================================================================
+# Fires many concurrent authenticated requests at a running server and
+# reports throughput and latency percentiles. Run it against the same
+# endpoint before and after a change to compare:
+#
+#   uvicorn app.main:app --workers 1
+#   python -m app.bench --email admin@example.com --password Secret123
+#   python -m app.bench --token <jwt> --path /api/v1/users/ -c 100 -n 5000
+#
+# Compare runs of the same command against the sync-engine and async-engine
+# revisions at several --concurrency values. No reference numbers are kept
+# here; record the ones you measure alongside the change they justify.
+# =============================================================================
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Optional
+
+import httpx
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    """Obtain an access token through the JSON login endpoint."""
+    response = await client.post(
+        "/api/v1/auth/login/json",
+        json={"email": email, "password": password},
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run(
+    base_url: str,
+    path: str,
+    token: Optional[str],
+    email: Optional[str],
+    password: Optional[str],
+    concurrency: int,
+    total: int,
+) -> dict:
+    """
+    Issue ``total`` GET requests to ``path`` with ``concurrency`` in flight.
+
+    Returns:
+        dict: request count, error count, elapsed seconds, req/s and
+        p50/p95/p99 latency in milliseconds
+    """
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        if token is None:
+            token = await _login(client, email, password)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        remaining = iter(range(total))
+        latencies: list[float] = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-request throughput benchmark")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+    parser.add_argument("--path", default="/api/v1/users/profile", help="Endpoint to hit")
+    parser.add_argument("--token", help="Access token (skips login)")
+    parser.add_argument("--email", help="Login email when no token is given")
+    parser.add_argument("--password", help="Login password when no token is given")
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.token is None and not (args.email and args.password):
+        parser.error("pass --token, or --email and --password")
+
+    result = asyncio.run(run(
+        args.url, args.path, args.token, args.email, args.password,
+        args.concurrency, args.requests,
+    ))
+    for key, value in result.items():
+        print(f"{key:>10}: {value}")
+
+
+if __name__ == "__main__":
+    main()
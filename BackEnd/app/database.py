@@ -3,11 +3,20 @@
 # =============================================================================
 # Handles SQLAlchemy engine creation, session management, and base model setup.
 # Uses connection pooling for better performance in production.
+#
+# Two engines share the same database:
+#   - engine (sync, psycopg2): startup DDL and seeding only
+#   - async_engine (asyncpg): every request handler, via get_db()
+# The request path must never touch the sync engine, since a blocking
+# query inside an ``async def`` handler stalls the whole event loop.
 # =============================================================================
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
+from observability import metrics
 from app.config import settings
 
 # =============================================================================
@@ -30,10 +39,41 @@ engine = create_engine(
     echo=settings.debug,
 )
 
+# =============================================================================
+# Async Engine Configuration
+# =============================================================================
+# Uses settings.async_database_url when set, otherwise swaps the driver of
+# settings.database_url for asyncpg. Pool sizing mirrors the sync engine.
+# =============================================================================
+
+def _async_url() -> str:
+    """Return the asyncpg connection URL for the configured database."""
+    if settings.async_database_url:
+        return settings.async_database_url
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    _async_url(),
+    pool_size=5,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    echo=settings.debug,
+)
+
+# Statement counts/timings and pool waits for /metrics
+metrics.instrument_engine(engine, "app")
+metrics.instrument_engine(async_engine.sync_engine, "app_async")
+
 # =============================================================================
 # Session Factory
 # =============================================================================
-# SessionLocal creates database sessions for each request.
+# SessionLocal creates sync sessions for startup tasks.
 # autocommit=False: Transactions must be explicitly committed
 # autoflush=False: Changes won't be sent to DB until commit
 # =============================================================================
@@ -44,6 +84,16 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# AsyncSessionLocal creates database sessions for each request.
+# expire_on_commit=False: objects stay readable after commit, because an
+# expired attribute would need an implicit (blocking) refresh to load.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # =============================================================================
 # Declarative Base
 # =============================================================================
@@ -54,26 +104,25 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
     Database session dependency for FastAPI routes.
     
-    Yields a database session and ensures it's closed after the request.
+    Yields an async database session and ensures it's closed after the request.
     Use this with FastAPI's Depends() for automatic session management.
+    Relationships are not lazy-loadable on an AsyncSession, so load the ones
+    you need with selectinload() in the query.
     
     Usage:
         @app.get("/items")
-        def get_items(db: Session = Depends(get_db)):
-            return db.query(Item).all()
+        async def get_items(db: AsyncSession = Depends(get_db)):
+            return (await db.scalars(select(Item))).all()
     
     Yields:
-        Session: SQLAlchemy database session
+        AsyncSession: SQLAlchemy async database session
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def init_db():
@@ -8,9 +8,13 @@
 from typing import List, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.database import get_db
 from app.auth import TokenManager
+from app.permissions import ADMIN_ROLES, permission_table
+from app.principals import Principal, principal_cache
 from app import models
 
 # =============================================================================
@@ -37,31 +41,40 @@ oauth2_scheme_optional = OAuth2PasswordBearer(
 # Authentication Dependencies
 # =============================================================================
 
-async def get_current_user(
+def select_user_with_roles():
+    """
+    SELECT statement for users with their roles eagerly loaded.
+    
+    AsyncSession cannot lazy-load ``User.roles``, and nearly every consumer
+    (RoleChecker, PermissionChecker, UserResponse) reads it, so load it in
+    the same round trip. ``User.roles`` defaults to selectin loading as
+    well; the option keeps call sites explicit about what they fetch.
+    
+    Usage:
+        user = await db.scalar(select_user_with_roles().where(models.User.id == 1))
+    """
+    return select(models.User).options(selectinload(models.User.roles))
+
+
+async def get_current_principal(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
     """
-    Get the current authenticated user from JWT token.
+    Get the authorization principal for the JWT token's subject.
     
-    This dependency validates the JWT token, extracts the user ID,
-    and fetches the user from the database.
+    Served from principal_cache when warm, so role and permission checks
+    need no database query; on a miss the user and roles are loaded once
+    and cached.
     
-    Args:
-        token: JWT access token from Authorization header
-        db: Database session
-        
-    Returns:
-        User: The authenticated user model
-        
     Raises:
         HTTPException 401: If token is invalid or user not found
         HTTPException 403: If user account is inactive
         
     Usage:
-        @app.get("/profile")
-        def get_profile(user: models.User = Depends(get_current_user)):
-            return user
+        @app.get("/whoami")
+        async def whoami(principal: Principal = Depends(get_current_principal)):
+            return {"id": principal.id, "roles": sorted(principal.roles)}
     """
     # Decode and validate token
     payload = TokenManager.decode_token(token, token_type="access")
@@ -74,29 +87,79 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Fetch user from database
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+    # Only queries when roles changed or the compiled table expired
+    await permission_table.ensure_loaded(db)
     
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await db.scalar(
+            select_user_with_roles().where(models.User.id == int(user_id))
         )
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        principal = Principal.from_user(user)
+        principal_cache.set(user_id, principal)
     
     # Check if user account is active
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
     
+    return principal
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+) -> models.User:
+    """
+    Get the current authenticated user from JWT token.
+    
+    Authentication and the active check happen in get_current_principal;
+    this loads the full user model for handlers that serialize or modify it.
+    Handlers that only need the id, name, email or roles, and dependencies
+    that only authorize, should use the principal instead.
+    
+    Args:
+        principal: Authorization principal of the token's subject
+        db: Database session
+        
+    Returns:
+        User: The authenticated user model
+        
+    Raises:
+        HTTPException 401: If token is invalid or user not found
+        HTTPException 403: If user account is inactive
+        
+    Usage:
+        @app.get("/profile")
+        def get_profile(user: models.User = Depends(get_current_user)):
+            return user
+    """
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == principal.id)
+    )
+    
+    if user is None:
+        principal_cache.invalidate(principal.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     return user
 
 
 async def get_current_user_optional(
     token: Optional[str] = Depends(oauth2_scheme_optional),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[models.User]:
     """
     Optionally get the current user if token is provided.
@@ -118,7 +181,9 @@ async def get_current_user_optional(
         payload = TokenManager.decode_token(token, token_type="access")
         user_id = payload.get("sub")
         if user_id:
-            user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+            user = await db.scalar(
+                select_user_with_roles().where(models.User.id == int(user_id))
+            )
             if user and user.is_active:
                 return user
     except HTTPException:
@@ -175,24 +240,25 @@ class RoleChecker:
             allowed_roles: List of role names that can access the route
         """
         self.allowed_roles = allowed_roles
+        # Compiled once; each check is a single AND against the principal
+        self.role_mask = permission_table.role_mask(allowed_roles)
+        self.requires_admin = bool(self.role_mask & ADMIN_ROLES)
     
     async def __call__(
         self, 
-        current_user: models.User = Depends(get_current_user)
-    ) -> models.User:
+        current_user: Principal = Depends(get_current_principal)
+    ) -> Principal:
         """
         Check if user has required role.
+        Answered from the cached principal; no database query.
         Also grants access if is_admin column is True and admin role is required.
         """
-        admin_roles = {"admin", "superadmin"}
-        requires_admin = bool(set(self.allowed_roles) & admin_roles)
-
         # Grant if is_admin column is set AND an admin role is in allowed list
-        if requires_admin and current_user.is_admin:
+        if self.requires_admin and current_user.is_admin:
             return current_user
 
         # Otherwise check via role assignments
-        if not current_user.has_any_role(self.allowed_roles):
+        if not current_user.has_any_role(self.role_mask):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required roles: {', '.join(self.allowed_roles)}"
@@ -220,8 +286,8 @@ require_user = RoleChecker(["user", "moderator", "admin", "superadmin"])
 
 
 async def get_admin_user(
-    current_user: models.User = Depends(get_current_user)
-) -> models.User:
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
     """
     Get current user and verify they have admin privileges.
     Checks both the is_admin column (set directly in DB) and role assignments.
@@ -235,8 +301,8 @@ async def get_admin_user(
 
 
 async def get_superadmin_user(
-    current_user: models.User = Depends(get_current_user)
-) -> models.User:
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
     """
     Get current user and verify they have superadmin privileges.
     """
@@ -273,24 +339,18 @@ class PermissionChecker:
             required_permission: Permission key to check
         """
         self.required_permission = required_permission
+        self.permission_bit = permission_table.permission_bit(required_permission)
     
     async def __call__(
         self, 
-        current_user: models.User = Depends(get_current_user)
-    ) -> models.User:
+        current_user: Principal = Depends(get_current_principal)
+    ) -> Principal:
         """
         Check if user has required permission through any of their roles.
+        Role permissions are compiled to bits when the roles table is loaded.
         """
-        import json
-        
-        for role in current_user.roles:
-            try:
-                permissions = json.loads(role.permissions or "{}")
-                # Check for specific permission or 'all' permission
-                if permissions.get(self.required_permission) or permissions.get("all"):
-                    return current_user
-            except json.JSONDecodeError:
-                continue
+        if current_user.has_permission(self.permission_bit):
+            return current_user
         
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
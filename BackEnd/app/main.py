@@ -1,15 +1,22 @@
 
+import asyncio
+import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
+from observability import metrics
+from observability import querycount
 from app.config import settings
-from app.database import engine, Base, get_db, SessionLocal
-from app import models
+from app.database import engine, async_engine, Base, get_db, SessionLocal, AsyncSessionLocal
+from app.auth import password_hasher
+from app.permissions import permission_table
+from app.principals import Principal, principal_cache
+from app.revocation import revocation_list
 from app.models import create_default_roles
 from app.dependencies import (
-    get_current_user,
+    get_current_principal,
     get_admin_user,
     require_admin,
     require_superadmin,
@@ -28,12 +35,20 @@ async def lifespan(app: FastAPI):
     try:
         create_default_roles(db)
         print("✅ Default roles initialized")
+        permission_table.load_sync(db)
+        print("✅ Permission table compiled")
+        revocation_list.load_sync(db)
+        print("✅ Token revocation list loaded")
     finally:
         db.close()
+    revocation_sync = asyncio.create_task(revocation_list.run(AsyncSessionLocal))
     print("✅ Application startup complete")
     print(f"📖 API docs available at: http://127.0.0.1:8000/docs")
     yield
     print("👋 Shutting down JanaSewa Backend...")
+    revocation_sync.cancel()
+    password_hasher.shutdown()
+    await async_engine.dispose()
 
 
 
@@ -62,6 +77,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Dev only: print routes whose SQL repeats per row (N+1)
+if os.environ.get("QUERY_DEBUG") == "1":
+    app.add_middleware(querycount.NPlusOneMiddleware)
+# Outermost, so its timings include CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
+
 
 
 @app.exception_handler(HTTPException)
@@ -104,7 +125,7 @@ async def root():
 )
 async def health_check(db=Depends(get_db)):
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -122,8 +143,8 @@ async def health_check(db=Depends(get_db)):
     summary="User Dashboard",
     description="Dashboard accessible to all authenticated users."
 )
-async def user_dashboard(current_user: models.User = Depends(get_current_user)):
-    role_names = [role.name for role in current_user.roles]
+async def user_dashboard(current_user: Principal = Depends(get_current_principal)):
+    role_names = list(current_user.role_names)
     return {
         "message": f"Welcome to your dashboard, {current_user.name}!",
         "user_id": current_user.id,
@@ -139,7 +160,7 @@ async def user_dashboard(current_user: models.User = Depends(get_current_user)):
     description="Dashboard accessible only to admin users.",
     dependencies=[Depends(require_admin)]
 )
-async def admin_dashboard(current_user: models.User = Depends(get_current_user)):
+async def admin_dashboard(current_user: Principal = Depends(get_current_principal)):
     return {
         "message": f"Welcome Admin {current_user.name}!",
         "admin_panel": True,
@@ -158,7 +179,7 @@ async def admin_dashboard(current_user: models.User = Depends(get_current_user))
     description="Dashboard accessible only to superadmin users.",
     dependencies=[Depends(require_superadmin)]
 )
-async def superadmin_dashboard(current_user: models.User = Depends(get_current_user)):
+async def superadmin_dashboard(current_user: Principal = Depends(get_current_principal)):
     return {
         "message": f"Welcome Superadmin {current_user.name}!",
         "system_access": "full",
@@ -178,11 +199,11 @@ async def superadmin_dashboard(current_user: models.User = Depends(get_current_u
     description="Example endpoint with custom role requirements.",
     dependencies=[Depends(RoleChecker(["moderator", "admin", "superadmin"]))]
 )
-async def moderator_endpoint(current_user: models.User = Depends(get_current_user)):
+async def moderator_endpoint(current_user: Principal = Depends(get_current_principal)):
     return {
         "message": f"Hello {current_user.name}!",
         "access_level": "moderator+",
-        "your_roles": [role.name for role in current_user.roles]
+        "your_roles": list(current_user.role_names)
     }
 
 
@@ -209,7 +230,7 @@ async def root():
 )
 async def health_check(db=Depends(get_db)):
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -225,8 +246,8 @@ async def health_check(db=Depends(get_db)):
     summary="User Dashboard",
     description="Dashboard accessible to all authenticated users."
 )
-async def user_dashboard(current_user: models.User = Depends(get_current_user)):
-    role_names = [role.name for role in current_user.roles]
+async def user_dashboard(current_user: Principal = Depends(get_current_principal)):
+    role_names = list(current_user.role_names)
     return {
         "message": f"Welcome to your dashboard, {current_user.name}!",
         "user_id": current_user.id,
@@ -242,7 +263,7 @@ async def user_dashboard(current_user: models.User = Depends(get_current_user)):
     description="Dashboard accessible only to admin users.",
     dependencies=[Depends(require_admin)]
 )
-async def admin_dashboard(current_user: models.User = Depends(get_current_user)):
+async def admin_dashboard(current_user: Principal = Depends(get_current_principal)):
     return {
         "message": f"Welcome Admin {current_user.name}!",
         "admin_panel": True,
@@ -260,7 +281,7 @@ async def admin_dashboard(current_user: models.User = Depends(get_current_user))
     description="Dashboard accessible only to superadmin users.",
     dependencies=[Depends(require_superadmin)]
 )
-async def superadmin_dashboard(current_user: models.User = Depends(get_current_user)):
+async def superadmin_dashboard(current_user: Principal = Depends(get_current_principal)):
     return {
         "message": f"Welcome Superadmin {current_user.name}!",
         "system_access": "full",
@@ -279,13 +300,59 @@ async def superadmin_dashboard(current_user: models.User = Depends(get_current_u
     description="Example endpoint with custom role requirements.",
     dependencies=[Depends(RoleChecker(["moderator", "admin", "superadmin"]))]
 )
-async def moderator_endpoint(current_user: models.User = Depends(get_current_user)):
+async def moderator_endpoint(current_user: Principal = Depends(get_current_principal)):
     return {
         "message": f"Hello {current_user.name}!",
         "access_level": "moderator+",
-        "your_roles": [role.name for role in current_user.roles]
+        "your_roles": list(current_user.role_names)
     }
 
+@app.get(
+    "/metrics",
+    tags=["Metrics"],
+    summary="Prometheus metrics",
+    description="Request latency, status codes, SQL per request, pool, bcrypt and JWT timings in Prometheus text format. "
+                "Requires the METRICS_TOKEN bearer token if one is set, otherwise a client in METRICS_ALLOWED_NETWORKS (loopback by default)."
+)
+async def prometheus_metrics(request: Request):
+    return metrics.metrics_endpoint(request)
+
+
+@app.get(
+    "/api/v1/metrics/hashing",
+    tags=["Metrics"],
+    summary="Password hashing metrics",
+    description="bcrypt pool size, queue depth, rejections and hash latency. Admin access required.",
+    dependencies=[Depends(require_admin)]
+)
+async def hashing_metrics():
+    return password_hasher.metrics()
+
+
+@app.get(
+    "/api/v1/metrics/principals",
+    tags=["Metrics"],
+    summary="Principal cache metrics",
+    description="Principal cache size and hit/miss counts, and the compiled permission table. Admin access required.",
+    dependencies=[Depends(require_admin)]
+)
+async def principal_cache_metrics():
+    return {
+        "principals": principal_cache.metrics(),
+        "permission_table": permission_table.metrics(),
+    }
+
+
+@app.get(
+    "/api/v1/metrics/revocations",
+    tags=["Metrics"],
+    summary="Token revocation metrics",
+    description="Entries in the in-memory token revocation list. Admin access required.",
+    dependencies=[Depends(require_admin)]
+)
+async def revocation_metrics():
+    return revocation_list.metrics()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -10,7 +10,7 @@ from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, 
     ForeignKey, Table, Text, UniqueConstraint
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.database import Base
 
 # =============================================================================
@@ -49,7 +49,9 @@ class Role(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, nullable=False, index=True)
     description = Column(String(255), nullable=True)
-    permissions = Column(Text, nullable=True, default="{}")  # JSON string for extensibility
+    # JSON string for extensibility. Only the permission compiler reads it
+    # (as a column select), so entity loads skip it and raise if touched.
+    permissions = deferred(Column(Text, nullable=True, default="{}"), raiseload=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
@@ -59,7 +61,16 @@ class Role(Base):
     )
     
     # Relationship: Roles -> Users (many-to-many)
-    users = relationship("User", secondary=user_roles, back_populates="roles")
+    # Potentially huge and never serialized; lazy-loading it raises. Deleting
+    # a role leaves the user_roles rows to ON DELETE CASCADE instead of
+    # loading the collection to clear it.
+    users = relationship(
+        "User",
+        secondary=user_roles,
+        back_populates="roles",
+        lazy="raise_on_sql",
+        passive_deletes=True,
+    )
     
     def __repr__(self):
         return f"<Role(id={self.id}, name='{self.name}')>"
@@ -106,7 +117,9 @@ class User(Base):
     last_login = Column(DateTime(timezone=True), nullable=True)
     
     # Relationship: User -> Roles (many-to-many)
-    roles = relationship("Role", secondary=user_roles, back_populates="users")
+    # Every user response and principal needs the roles, so they are always
+    # fetched with one extra SELECT ... IN per query rather than lazily.
+    roles = relationship("Role", secondary=user_roles, back_populates="users", lazy="selectin")
     
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}')>"
@@ -141,7 +154,7 @@ class User(Base):
         Returns True if user is admin either by the is_admin column
         OR by having the admin/superadmin role assigned.
         """
-        return self.is_admin or self.has_role("admin") or self.has_role("superadmin")
+        return self.is_admin or self.has_any_role(["admin", "superadmin"])
 
     @property
     def is_superadmin(self) -> bool:
@@ -149,6 +162,34 @@ class User(Base):
         return self.has_role("superadmin")
 
 
+class RevokedToken(Base):
+    """
+    Persistent token revocation list.
+    
+    A row with a ``jti`` revokes that single token (logout). A row without
+    one revokes every token of ``user_id`` issued at or before
+    ``revoked_at`` (forced sign-out, deactivation). Rows are only needed
+    until every token they cover has expired, then they are pruned.
+    
+    Attributes:
+        id: Unique identifier (also the sync cursor for other workers)
+        jti: Revoked token ID, or NULL for a user-wide revocation
+        user_id: Owner of the revoked token(s)
+        revoked_at: When the revocation was made
+        expires_at: When the last covered token expires
+    """
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(32), unique=True, nullable=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<RevokedToken(id={self.id}, jti='{self.jti}', user_id={self.user_id})>"
+
+
 # =============================================================================
 # Role Constants
 # =============================================================================
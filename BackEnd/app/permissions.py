@@ -0,0 +1,164 @@
+# =============================================================================
+# Permission Compiler - Roles and Permissions as Bits
+# =============================================================================
+# Every role name and every permission key gets one bit of a Python int.
+# A principal's roles become a single role mask, RoleChecker and
+# PermissionChecker precompute their masks once, and each check is one
+# integer AND instead of set building and JSON parsing per request.
+#
+# Bits are allocated on first mention and never reassigned, so masks built
+# before a reload stay valid after it. What a reload changes is which
+# permissions each role grants: the roles table is read once, each role's
+# permissions JSON is compiled to a mask, and the role-mask -> permission-mask
+# lookup is rebuilt.
+#
+# The table reloads on the next request after any Role is flushed by this
+# process (see the after_flush hook below), and otherwise every
+# permission_reload_seconds so changes made by other workers are picked up.
+# All access happens on the event loop thread (or at startup), so no locking.
+# =============================================================================
+
+import json
+import time
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app import models
+
+# Permission mask of a role granted "all": every bit set
+ALL_PERMISSIONS = -1
+
+
+class PermissionTable:
+    """
+    Compiled view of the roles table.
+
+    Usage:
+        admin_mask = permission_table.role_mask(["admin", "superadmin"])
+        can_delete = permission_table.permission_bit("can_delete")
+
+        if principal.role_mask & admin_mask: ...
+        if permission_table.grants(principal.role_mask) & can_delete: ...
+    """
+
+    def __init__(self, reload_seconds: float):
+        self.reload_seconds = reload_seconds
+        self._role_bits: Dict[str, int] = {}
+        self._permission_bits: Dict[str, int] = {}
+        self._role_masks: Dict[Tuple[str, ...], int] = {}
+        # role bit -> permission mask granted by that role
+        self._role_grants: Dict[int, int] = {}
+        # role mask -> union of its roles' grants (memoized)
+        self._grants: Dict[int, int] = {}
+        self._expires_at = 0.0
+        self._stale = True
+
+    @staticmethod
+    def _allocate(bits: Dict[str, int], name: str) -> int:
+        bit = bits.get(name)
+        if bit is None:
+            bit = bits[name] = 1 << len(bits)
+        return bit
+
+    def role_bit(self, name: str) -> int:
+        """Bit for role ``name``, allocated on first use."""
+        return self._allocate(self._role_bits, name)
+
+    def role_mask(self, names: Iterable[str]) -> int:
+        """OR of the bits of every role in ``names``."""
+        key = tuple(names)
+        mask = self._role_masks.get(key)
+        if mask is None:
+            mask = 0
+            for name in key:
+                mask |= self.role_bit(name)
+            self._role_masks[key] = mask
+        return mask
+
+    def permission_bit(self, name: str) -> int:
+        """Bit for permission key ``name``, allocated on first use."""
+        return self._allocate(self._permission_bits, name)
+
+    def grants(self, role_mask: int) -> int:
+        """Permission mask granted by the roles in ``role_mask``."""
+        mask = self._grants.get(role_mask)
+        if mask is None:
+            mask = 0
+            for role_bit, granted in self._role_grants.items():
+                if role_mask & role_bit:
+                    mask |= granted
+            self._grants[role_mask] = mask
+        return mask
+
+    def _compile(self, permissions_json: str) -> int:
+        try:
+            permissions = json.loads(permissions_json or "{}")
+        except json.JSONDecodeError:
+            # Malformed permissions grant nothing, as before
+            return 0
+        if not isinstance(permissions, dict):
+            # Valid JSON but not an object ("[]", "true", "null"): same
+            return 0
+        if permissions.get("all"):
+            return ALL_PERMISSIONS
+        mask = 0
+        for key, value in permissions.items():
+            if value:
+                mask |= self.permission_bit(key)
+        return mask
+
+    def load(self, rows: Iterable[Tuple[str, str]]):
+        """Compile ``(role name, permissions JSON)`` rows into the table."""
+        role_grants = {}
+        for name, permissions_json in rows:
+            role_grants[self.role_bit(name)] = self._compile(permissions_json)
+        self._role_grants = role_grants
+        self._grants = {}
+        self._expires_at = time.monotonic() + self.reload_seconds
+        self._stale = False
+
+    def load_sync(self, db: Session):
+        """Load from a sync session (startup)."""
+        self.load(db.execute(select(models.Role.name, models.Role.permissions)).all())
+
+    async def ensure_loaded(self, db):
+        """Reload from an AsyncSession if roles changed or the table expired."""
+        if not self._stale and time.monotonic() < self._expires_at:
+            return
+        result = await db.execute(select(models.Role.name, models.Role.permissions))
+        self.load(result.all())
+
+    def mark_stale(self):
+        """Force a reload on the next ensure_loaded()."""
+        self._stale = True
+
+    def metrics(self) -> dict:
+        return {
+            "roles": len(self._role_bits),
+            "permissions": len(self._permission_bits),
+            "memoized_grants": len(self._grants),
+            "stale": self._stale,
+            "reload_seconds": self.reload_seconds,
+        }
+
+
+permission_table = PermissionTable(reload_seconds=settings.permission_reload_seconds)
+
+# Masks used by the built-in admin checks
+ADMIN_ROLES = permission_table.role_mask((models.RoleNames.ADMIN, models.RoleNames.SUPERADMIN))
+SUPERADMIN_ROLE = permission_table.role_bit(models.RoleNames.SUPERADMIN)
+
+
+@event.listens_for(Session, "after_flush")
+def _roles_changed(session, flush_context):
+    """Mark the table stale when a flush inserts, updates or deletes a Role."""
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, models.Role):
+            permission_table.mark_stale()
+            return
+    for obj in session.dirty:
+        # Role.users backref changes (assigning roles to users) don't count
+        if isinstance(obj, models.Role) and session.is_modified(obj, include_collections=False):
+            permission_table.mark_stale()
+            return
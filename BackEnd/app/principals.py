@@ -0,0 +1,143 @@
+# =============================================================================
+# Principal Cache - Authorization Without Database Queries
+# =============================================================================
+# Authorization only needs a handful of facts about the caller: id, active
+# flag, admin flag and active roles (a bitmask from permissions.py, from
+# which the granted permissions follow). Those, plus the name and email that
+# greetings and dashboards show, are captured in an immutable Principal and
+# cached per token subject, so role and permission checks on a warm cache
+# never touch the database.
+#
+# Entries expire after principal_cache_ttl_seconds and the least recently
+# used entry is evicted beyond principal_cache_size. Handlers that change a
+# user's status, roles, profile or password invalidate that user's entry, and
+# any change to a Role clears the whole cache. The cache is per worker
+# process: invalidation reaches only the worker that made the change, and the
+# TTL bounds how stale the others can be.
+# =============================================================================
+
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.permissions import ADMIN_ROLES, SUPERADMIN_ROLE, permission_table
+from app import models
+
+
+class Principal(NamedTuple):
+    """
+    Compact, immutable view of a user for authorization checks.
+
+    Roles are held as a bitmask from the compiled permission table, so
+    role and permission checks are single integer operations.
+    """
+    id: int
+    name: str
+    email: str
+    is_active: bool
+    is_admin: bool
+    role_names: Tuple[str, ...]
+    role_mask: int
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        """
+        Build a principal from a User with its roles loaded.
+
+        Deactivated roles are left out, so they grant nothing.
+        """
+        role_names = tuple(role.name for role in user.roles if role.is_active)
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            role_names=role_names,
+            role_mask=permission_table.role_mask(role_names),
+        )
+
+    def has_role(self, role_name: str) -> bool:
+        return bool(self.role_mask & permission_table.role_bit(role_name))
+
+    def has_any_role(self, role_mask: int) -> bool:
+        """True if the principal holds any role in a precompiled ``role_mask``."""
+        return bool(self.role_mask & role_mask)
+
+    def check_is_admin(self) -> bool:
+        return self.is_admin or bool(self.role_mask & ADMIN_ROLES)
+
+    @property
+    def is_superadmin(self) -> bool:
+        return bool(self.role_mask & SUPERADMIN_ROLE)
+
+    def has_permission(self, permission_bit: int) -> bool:
+        """True if any role grants the permission (or ``all``)."""
+        return bool(permission_table.grants(self.role_mask) & permission_bit)
+
+
+class PrincipalCache:
+    """
+    TTL/LRU cache of principals keyed by the token's ``sub``.
+
+    Only touched from the event loop thread, so it needs no locking.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sub: str) -> Optional[Principal]:
+        entry = self._data.get(sub)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[sub]
+            self.misses += 1
+            return None
+        self._data.move_to_end(sub)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, sub: str, principal: Principal):
+        self._data[sub] = (time.monotonic() + self.ttl, principal)
+        self._data.move_to_end(sub)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """Drop the cached principal for ``user_id`` after it changed."""
+        self._data.pop(str(user_id), None)
+
+    def clear(self):
+        self._data.clear()
+
+    def metrics(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _roles_changed(session, flush_context):
+    """Drop every cached principal when a flush changes or deletes a Role."""
+    for obj in (*session.deleted, *session.dirty):
+        if isinstance(obj, models.Role) and (
+            obj in session.deleted or session.is_modified(obj, include_collections=False)
+        ):
+            principal_cache.clear()
+            return
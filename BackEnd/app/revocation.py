@@ -0,0 +1,158 @@
+# =============================================================================
+# Token Revocation List
+# =============================================================================
+# Every issued token carries a random ``jti``. Revocations are persisted in
+# the revoked_tokens table and mirrored in memory, so the check inside
+# TokenManager.decode_token is two dict lookups and never a database query:
+#
+#   - revoked jtis (logout of one token)
+#   - per-user cutoffs: tokens of that user issued at or before the cutoff
+#     are revoked (forced sign-out, deactivation). Tokens carry a sub-second
+#     ``iat`` so the comparison is exact.
+#
+# The in-memory copy is loaded at startup. A background task then pulls
+# rows added by other workers every revocation_sync_seconds, drops entries
+# whose tokens have all expired, and deletes those rows from the table.
+# Ids are handed out at insert but rows become visible at commit, so a
+# late commit can land below the id cursor; each sync therefore also
+# re-reads rows revoked within SYNC_OVERLAP of the previous one. Adding a
+# row twice is harmless.
+# =============================================================================
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+from sqlalchemy import delete, or_, select
+from app.config import settings
+from app import models
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """
+    In-memory mirror of the revoked_tokens table.
+
+    Only touched from the event loop thread (and at startup), so it needs
+    no locking.
+
+    Usage:
+        if revocation_list.is_revoked(payload): reject
+        await revocation_list.revoke_token(db, payload)
+        await revocation_list.revoke_user(db, user.id)
+    """
+
+    # Re-read window covering late commits and clock skew between workers
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, sync_seconds: float):
+        self.sync_seconds = sync_seconds
+        # jti -> expiry (unix seconds)
+        self._jtis: Dict[str, float] = {}
+        # str(user_id) -> (cutoff, expiry) in unix seconds
+        self._users: Dict[str, Tuple[float, float]] = {}
+        self._last_id = 0
+        self._last_sync = datetime.now(timezone.utc)
+
+    def is_revoked(self, payload: dict) -> bool:
+        """Check a decoded token payload against the revocation list."""
+        if payload.get("jti") in self._jtis:
+            return True
+        cutoff = self._users.get(payload.get("sub"))
+        return cutoff is not None and payload.get("iat", 0) <= cutoff[0]
+
+    def _add(self, row: models.RevokedToken):
+        expires = row.expires_at.timestamp()
+        if row.jti is not None:
+            self._jtis[row.jti] = expires
+        else:
+            key = str(row.user_id)
+            cutoff = row.revoked_at.timestamp()
+            current = self._users.get(key)
+            if current is None or cutoff > current[0]:
+                self._users[key] = (cutoff, max(expires, current[1] if current else 0))
+        self._last_id = max(self._last_id, row.id)
+
+    def _prune(self):
+        now = datetime.now(timezone.utc).timestamp()
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._users = {sub: entry for sub, entry in self._users.items() if entry[1] > now}
+
+    async def revoke_token(self, db, payload: dict):
+        """Revoke the single token described by ``payload``; commits."""
+        jti = payload.get("jti")
+        if jti is None or jti in self._jtis:
+            return
+        row = models.RevokedToken(
+            jti=jti,
+            user_id=int(payload["sub"]),
+            expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc),
+        )
+        db.add(row)
+        await db.commit()
+        self._add(row)
+
+    async def revoke_user(self, db, user_id: int):
+        """Revoke every token issued to ``user_id`` so far; commits."""
+        now = datetime.now(timezone.utc)
+        row = models.RevokedToken(
+            user_id=user_id,
+            revoked_at=now,
+            # Covers the longest-lived token that could have been issued
+            expires_at=now + timedelta(days=settings.refresh_token_expire_days),
+        )
+        db.add(row)
+        await db.commit()
+        self._add(row)
+
+    def load_sync(self, db):
+        """Load every unexpired revocation from a sync session (startup)."""
+        now = datetime.now(timezone.utc)
+        rows = db.scalars(
+            select(models.RevokedToken).where(models.RevokedToken.expires_at > now)
+        ).all()
+        for row in rows:
+            self._add(row)
+
+    async def sync(self, db):
+        """Pick up revocations made by other workers and prune expired ones."""
+        started = datetime.now(timezone.utc)
+        rows = (await db.scalars(
+            select(models.RevokedToken)
+            .where(or_(
+                models.RevokedToken.id > self._last_id,
+                models.RevokedToken.revoked_at >= self._last_sync - self.SYNC_OVERLAP,
+            ))
+            .order_by(models.RevokedToken.id)
+        )).all()
+        self._last_sync = started
+        for row in rows:
+            self._add(row)
+        self._prune()
+        await db.execute(
+            delete(models.RevokedToken)
+            .where(models.RevokedToken.expires_at < datetime.now(timezone.utc))
+        )
+        await db.commit()
+
+    async def run(self, session_factory):
+        """Background loop calling sync() every sync_seconds."""
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                async with session_factory() as db:
+                    await self.sync(db)
+            except Exception:
+                logger.exception("Revocation list sync failed")
+
+    def metrics(self) -> dict:
+        return {
+            "revoked_tokens": len(self._jtis),
+            "revoked_users": len(self._users),
+            "last_id": self._last_id,
+            "sync_seconds": self.sync_seconds,
+        }
+
+
+revocation_list = RevocationList(sync_seconds=settings.revocation_sync_seconds)
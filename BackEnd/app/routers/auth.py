@@ -1,16 +1,25 @@
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, AsyncSessionLocal
 from app import models, schemas
 from app.auth import (
     PasswordManager, 
     TokenManager, 
+    password_hasher, 
     create_access_token, 
     create_refresh_token
 )
-from app.dependencies import get_current_user
+from app.dependencies import (
+    get_current_user,
+    get_current_principal,
+    oauth2_scheme,
+    select_user_with_roles
+)
+from app.principals import Principal, principal_cache
+from app.revocation import revocation_list
 from app.config import settings
 from app.models import RoleNames
 
@@ -24,6 +33,28 @@ router = APIRouter(
 )
 
 
+async def _upgrade_password_hash(user_id: int, password: str, old_hash: str):
+    """
+    Re-hash a verified password with the current bcrypt cost.
+    
+    Runs as a background task after the login response is sent. The update
+    only applies if the stored hash is still ``old_hash``, so a concurrent
+    password change is never overwritten; updated_at is left untouched.
+    """
+    try:
+        new_hash = await password_hasher.hash(password)
+    except HTTPException:
+        # Hash pool is saturated; the next login will try again
+        return
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(models.User)
+            .where(models.User.id == user_id, models.User.password == old_hash)
+            .values(password=new_hash, updated_at=models.User.updated_at)
+        )
+        await db.commit()
+
+
 @router.post(
     "/register",
     response_model=schemas.UserResponse,
@@ -43,14 +74,14 @@ router = APIRouter(
 )
 async def register(
     user_data: schemas.UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new user account.
     """
-    existing_user = db.query(models.User).filter(
-        models.User.email == user_data.email
-    ).first()
+    existing_user = await db.scalar(
+        select(models.User.id).where(models.User.email == user_data.email)
+    )
     
     if existing_user:
         raise HTTPException(
@@ -58,7 +89,7 @@ async def register(
             detail="Email already registered"
         )
     
-    hashed_password = PasswordManager.hash_password(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     
     new_user = models.User(
         name=user_data.name,
@@ -68,16 +99,17 @@ async def register(
         is_verified=False
     )
     
-    default_role = db.query(models.Role).filter(
-        models.Role.name == RoleNames.USER
-    ).first()
+    default_role = await db.scalar(
+        select(models.Role).where(models.Role.name == RoleNames.USER)
+    )
     
     if default_role:
         new_user.roles.append(default_role)
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # Sessions don't expire on commit and all defaults are client-side,
+    # so new_user is already complete; no refresh round trip needed.
+    await db.commit()
     
     return new_user
 
@@ -98,15 +130,16 @@ async def register(
     """
 )
 async def login(
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Authenticate user and return JWT tokens.
     """
-    user = db.query(models.User).filter(
-        models.User.email == form_data.username
-    ).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.email == form_data.username)
+    )
     
     if not user:
         raise HTTPException(
@@ -121,15 +154,18 @@ async def login(
             detail="Account is inactive. Please contact support."
         )
     
-    if not PasswordManager.verify_password(form_data.password, user.password):
+    if not await password_hasher.verify(form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if PasswordManager.needs_rehash(user.password):
+        background_tasks.add_task(_upgrade_password_hash, user.id, form_data.password, user.password)
+    
     user.last_login = datetime.now(timezone.utc)
-    db.commit()
+    await db.commit()
     
     role_names = [r.name for r in user.roles]
     if user.is_admin or "superadmin" in role_names or "admin" in role_names:
@@ -160,14 +196,15 @@ async def login(
 )
 async def login_json(
     credentials: schemas.LoginRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Login with JSON body for non-form clients.
     """
-    user = db.query(models.User).filter(
-        models.User.email == credentials.email
-    ).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.email == credentials.email)
+    )
     
     if not user:
         raise HTTPException(
@@ -182,15 +219,18 @@ async def login_json(
             detail="Account is inactive"
         )
     
-    if not PasswordManager.verify_password(credentials.password, user.password):
+    if not await password_hasher.verify(credentials.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if PasswordManager.needs_rehash(user.password):
+        background_tasks.add_task(_upgrade_password_hash, user.id, credentials.password, user.password)
+    
     user.last_login = datetime.now(timezone.utc)
-    db.commit()
+    await db.commit()
 
     role_names = [r.name for r in user.roles]
     if user.is_admin or "superadmin" in role_names or "admin" in role_names:
@@ -226,7 +266,7 @@ async def login_json(
 )
 async def refresh_token(
     token_data: schemas.RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Exchange refresh token for new access token.
@@ -240,7 +280,9 @@ async def refresh_token(
             detail="Invalid refresh token"
         )
     
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == int(user_id))
+    )
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -271,33 +313,52 @@ async def refresh_token(
 )
 async def change_password(
     password_data: schemas.UserUpdatePassword,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Change password for authenticated user.
+    
+    Only the password hash is read; the principal already authenticated
+    the caller, so the full user and its roles are not loaded.
     """
-    if not PasswordManager.verify_password(
+    current_password = await db.scalar(
+        select(models.User.password).where(models.User.id == current_user.id)
+    )
+    if current_password is None:
+        principal_cache.invalidate(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not await password_hasher.verify(
         password_data.current_password, 
-        current_user.password
+        current_password
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    if PasswordManager.verify_password(
+    if await password_hasher.verify(
         password_data.new_password, 
-        current_user.password
+        current_password
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="New password must be different from current password"
         )
     
-    current_user.password = PasswordManager.hash_password(password_data.new_password)
-    current_user.updated_at = datetime.now(timezone.utc)
-    db.commit()
+    new_password = await password_hasher.hash(password_data.new_password)
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == current_user.id)
+        .values(password=new_password, updated_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+    principal_cache.invalidate(current_user.id)
     
     return {"message": "Password changed successfully", "success": True}
 
@@ -319,12 +380,36 @@ async def get_me(current_user: models.User = Depends(get_current_user)):
     description="""
     Logout the current user.
     
-    Note: Since JWTs are stateless, this endpoint is mainly for client-side
-    token cleanup. For full logout, implement token blacklisting.
+    Revokes the access token used for this request; it is rejected from
+    now on, even before it expires. Discard the refresh token client-side,
+    or use `/auth/logout/all` to revoke every token of the account.
     """
 )
-async def logout(current_user: models.User = Depends(get_current_user)):
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    payload = TokenManager.decode_token(token, token_type="access")
+    await revocation_list.revoke_token(db, payload)
     return {
         "message": "Successfully logged out. Please discard your tokens.",
         "success": True
     }
+
+
+@router.delete(
+    "/logout/all",
+    response_model=schemas.MessageResponse,
+    summary="Logout everywhere",
+    description="Revoke every access and refresh token issued to the current user so far."
+)
+async def logout_all(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    await revocation_list.revoke_user(db, current_user.id)
+    return {
+        "message": "Signed out of all sessions. Please log in again.",
+        "success": True
+    }
@@ -1,17 +1,21 @@
 from typing import List, Optional
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app import models, schemas
-from app.auth import PasswordManager
+from app.auth import password_hasher
+from app.principals import Principal, principal_cache
+from app.revocation import revocation_list
 from app.dependencies import (
     get_current_user,
+    get_current_principal,
     get_admin_user,
     get_superadmin_user,
     RoleChecker,
-    require_admin
+    require_admin,
+    select_user_with_roles
 )
 
 router = APIRouter(
@@ -45,15 +49,15 @@ async def get_profile(current_user: models.User = Depends(get_current_user)):
 async def update_profile(
     update_data: schemas.UserUpdate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update current user's profile.
     """
     if update_data.email and update_data.email != current_user.email:
-        existing = db.query(models.User).filter(
-            models.User.email == update_data.email
-        ).first()
+        existing = await db.scalar(
+            select(models.User.id).where(models.User.email == update_data.email)
+        )
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -66,8 +70,9 @@ async def update_profile(
         current_user.name = update_data.name
     
     current_user.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    # The cached principal carries name and email
+    principal_cache.invalidate(current_user.id)
     
     return current_user
 
@@ -85,15 +90,15 @@ async def list_users(
     search: Optional[str] = Query(None, description="Search by name or email"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     role: Optional[str] = Query(None, description="Filter by role name"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     List all users with pagination and filtering.
     """
-    query = db.query(models.User)
+    query = select_user_with_roles()
     
     if search:
-        query = query.filter(
+        query = query.where(
             or_(
                 models.User.name.ilike(f"%{search}%"),
                 models.User.email.ilike(f"%{search}%")
@@ -101,12 +106,12 @@ async def list_users(
         )
     
     if is_active is not None:
-        query = query.filter(models.User.is_active == is_active)
+        query = query.where(models.User.is_active == is_active)
     
     if role:
-        query = query.join(models.User.roles).filter(models.Role.name == role)
+        query = query.join(models.User.roles).where(models.Role.name == role)
     
-    users = query.offset(skip).limit(limit).all()
+    users = (await db.scalars(query.offset(skip).limit(limit))).all()
     
     return users
 
@@ -120,10 +125,12 @@ async def list_users(
 )
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific user by ID."""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == user_id)
+    )
     
     if not user:
         raise HTTPException(
@@ -144,14 +151,14 @@ async def get_user(
 )
 async def create_user(
     user_data: schemas.UserCreateAdmin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new user (admin only).
     """
-    existing = db.query(models.User).filter(
-        models.User.email == user_data.email
-    ).first()
+    existing = await db.scalar(
+        select(models.User.id).where(models.User.email == user_data.email)
+    )
     
     if existing:
         raise HTTPException(
@@ -162,26 +169,25 @@ async def create_user(
     new_user = models.User(
         name=user_data.name,
         email=user_data.email,
-        password=PasswordManager.hash_password(user_data.password),
+        password=await password_hasher.hash(user_data.password),
         is_active=True,
         is_verified=True
     )
     
     if user_data.role_ids:
-        roles = db.query(models.Role).filter(
-            models.Role.id.in_(user_data.role_ids)
-        ).all()
-        new_user.roles = roles
+        roles = await db.scalars(
+            select(models.Role).where(models.Role.id.in_(user_data.role_ids))
+        )
+        new_user.roles = list(roles)
     else:
-        default_role = db.query(models.Role).filter(
-            models.Role.name == models.RoleNames.USER
-        ).first()
+        default_role = await db.scalar(
+            select(models.Role).where(models.Role.name == models.RoleNames.USER)
+        )
         if default_role:
             new_user.roles.append(default_role)
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     
     return new_user
 
@@ -196,10 +202,12 @@ async def create_user(
 async def update_user(
     user_id: int,
     update_data: schemas.UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user information (admin only)."""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == user_id)
+    )
     
     if not user:
         raise HTTPException(
@@ -211,9 +219,9 @@ async def update_user(
         user.name = update_data.name
     
     if update_data.email is not None and update_data.email != user.email:
-        existing = db.query(models.User).filter(
-            models.User.email == update_data.email
-        ).first()
+        existing = await db.scalar(
+            select(models.User.id).where(models.User.email == update_data.email)
+        )
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -228,8 +236,12 @@ async def update_user(
         user.is_admin = update_data.is_admin
     
     user.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    principal_cache.invalidate(user.id)
+    
+    # Deactivation also kills tokens already issued, including refresh tokens
+    if update_data.is_active is False:
+        await revocation_list.revoke_user(db, user.id)
     
     return user
 
@@ -243,8 +255,8 @@ async def update_user(
 )
 async def delete_user(
     user_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a user (admin only)."""
     if user_id == current_user.id:
@@ -253,7 +265,9 @@ async def delete_user(
             detail="Cannot delete your own account"
         )
     
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == user_id)
+    )
     
     if not user:
         raise HTTPException(
@@ -267,12 +281,47 @@ async def delete_user(
             detail="Cannot delete a superadmin user"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    principal_cache.invalidate(user_id)
     
     return {"message": f"User {user.email} deleted successfully", "success": True}
 
 
+@router.post(
+    "/{user_id}/sign-out",
+    response_model=schemas.MessageResponse,
+    summary="Force sign-out (Admin)",
+    description="Revoke every access and refresh token issued to a user so far. Admin access required.",
+    dependencies=[Depends(require_admin)]
+)
+async def force_sign_out(
+    user_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoke all of a user's tokens (admin only)."""
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == user_id)
+    )
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if user.is_superadmin and not current_user.is_superadmin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot sign out a superadmin user"
+        )
+    
+    await revocation_list.revoke_user(db, user.id)
+    
+    return {"message": f"All sessions of {user.email} revoked", "success": True}
+
+
 @router.post(
     "/{user_id}/roles",
     response_model=schemas.UserResponse,
@@ -283,11 +332,13 @@ async def delete_user(
 async def assign_roles(
     user_id: int,
     role_data: schemas.UserRoleAssign,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Assign roles to a user."""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == user_id)
+    )
     
     if not user:
         raise HTTPException(
@@ -295,9 +346,9 @@ async def assign_roles(
             detail="User not found"
         )
     
-    roles_to_assign = db.query(models.Role).filter(
-        models.Role.id.in_(role_data.role_ids)
-    ).all()
+    roles_to_assign = (await db.scalars(
+        select(models.Role).where(models.Role.id.in_(role_data.role_ids))
+    )).all()
     
     for role in roles_to_assign:
         if role.name == models.RoleNames.SUPERADMIN and not current_user.is_superadmin:
@@ -314,8 +365,8 @@ async def assign_roles(
     all_role_names = {r.name for r in user.roles}
     user.is_admin = bool(all_role_names & {"admin", "superadmin"})
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    principal_cache.invalidate(user.id)
     
     return user
 
@@ -330,11 +381,13 @@ async def assign_roles(
 async def remove_roles(
     user_id: int,
     role_data: schemas.UserRoleRemove,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove roles from a user."""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.scalar(
+        select_user_with_roles().where(models.User.id == user_id)
+    )
     
     if not user:
         raise HTTPException(
@@ -343,19 +396,21 @@ async def remove_roles(
         )
     
     if user_id == current_user.id:
-        admin_roles = db.query(models.Role).filter(
-            models.Role.id.in_(role_data.role_ids),
-            models.Role.name.in_([models.RoleNames.ADMIN, models.RoleNames.SUPERADMIN])
-        ).all()
+        admin_roles = (await db.scalars(
+            select(models.Role).where(
+                models.Role.id.in_(role_data.role_ids),
+                models.Role.name.in_([models.RoleNames.ADMIN, models.RoleNames.SUPERADMIN])
+            )
+        )).all()
         if admin_roles:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot remove your own admin role"
             )
     
-    roles_to_remove = db.query(models.Role).filter(
-        models.Role.id.in_(role_data.role_ids)
-    ).all()
+    roles_to_remove = (await db.scalars(
+        select(models.Role).where(models.Role.id.in_(role_data.role_ids))
+    )).all()
     
     for role in roles_to_remove:
         if role.name == models.RoleNames.SUPERADMIN and not current_user.is_superadmin:
@@ -370,8 +425,8 @@ async def remove_roles(
     remaining_role_names = {r.name for r in user.roles}
     user.is_admin = bool(remaining_role_names & {"admin", "superadmin"})
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    principal_cache.invalidate(user.id)
     
     return user
 
@@ -383,7 +438,9 @@ async def remove_roles(
     description="Get all available roles. Admin access required.",
     dependencies=[Depends(require_admin)]
 )
-async def list_roles(db: Session = Depends(get_db)):
+async def list_roles(db: AsyncSession = Depends(get_db)):
     """Get all available roles."""
-    roles = db.query(models.Role).filter(models.Role.is_active == True).all()
+    roles = (await db.scalars(
+        select(models.Role).where(models.Role.is_active == True)
+    )).all()
     return roles
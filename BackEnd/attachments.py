@@ -0,0 +1,133 @@
+"""Files attached to applications and complaints.
+
+Every upload becomes one append-only row in ``attachments``, looked up by the
+``(owner_type, owner_id)`` index, instead of a read-modify-write of the
+application's JSON ``documents`` column.
+
+    python attachments.py --backfill   # convert legacy documents / attachment_path
+"""
+import argparse
+import mimetypes
+import os
+
+from sqlalchemy.orm import Session, defer
+
+import blobstore
+import models
+import uploads
+
+APPLICATION = "application"
+COMPLAINT = "complaint"
+
+
+def guess_mime_type(filename: str, content_type: str = None) -> str:
+    if content_type and content_type != "application/octet-stream":
+        return content_type
+    return mimetypes.guess_type(filename or "")[0] or "application/octet-stream"
+
+
+def add(db: Session, owner_type: str, owner_id: int, received: uploads.ReceivedFile,
+        category: str, filename: str, original_name: str, content_type: str,
+        uploaded_by: int) -> models.Attachment:
+    """Store a staged upload and record it against its owner; the caller commits"""
+    path = blobstore.register(db, received, category, filename)
+    attachment = models.Attachment(
+        owner_type=owner_type,
+        owner_id=owner_id,
+        path=path,
+        filename=original_name,
+        size=received.size,
+        mime_type=guess_mime_type(original_name, content_type),
+        sha256=received.sha256,
+        uploaded_by=uploaded_by,
+    )
+    db.add(attachment)
+    return attachment
+
+
+def _legacy_attachment(db: Session, owner_type: str, owner, path: str):
+    """Build an attachment row for a pre-existing path, filling metadata where known"""
+    filename = path.rsplit("/", 1)[-1]
+    size = sha256 = None
+    mapping = db.get(models.BlobPath, path)
+    if mapping is not None:
+        sha256 = mapping.sha256
+        blob = db.get(models.Blob, mapping.sha256)
+        size = blob.size if blob else None
+    else:
+        legacy = os.path.join(uploads.UPLOAD_DIR, *path.split("/")[2:])
+        if os.path.isfile(legacy):
+            size = os.path.getsize(legacy)
+    return models.Attachment(
+        owner_type=owner_type,
+        owner_id=owner.id,
+        path=path,
+        filename=filename,
+        size=size,
+        mime_type=guess_mime_type(filename),
+        sha256=sha256,
+        uploaded_by=owner.user_id,
+        # Keep legacy files ahead of anything uploaded since
+        created_at=owner.created_at,
+    )
+
+
+def _keyset_batches(db: Session, query, model, batch_size: int):
+    """Yield ``query`` rows in id order, one committed batch at a time"""
+    last_id = 0
+    while True:
+        batch = query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield batch
+        db.commit()
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    """Convert legacy document lists and complaint attachment paths into rows"""
+    created = 0
+    applications = db.query(models.Application).options(
+        defer(models.Application.form_data, raiseload=True)
+    ).filter(
+        models.Application.legacy_documents.isnot(None)
+    )
+    for batch in _keyset_batches(db, applications, models.Application, batch_size):
+        for application in batch:
+            legacy = application.legacy_documents or []
+            if not legacy:
+                continue
+            existing = {a.path for a in application.attachments}
+            for path in legacy:
+                if path not in existing:
+                    db.add(_legacy_attachment(db, APPLICATION, application, path))
+                    created += 1
+            application.legacy_documents = []
+
+    complaints = db.query(models.Complaint).options(
+        defer(models.Complaint.description, raiseload=True)
+    ).filter(
+        models.Complaint.attachment_path.isnot(None)
+    )
+    for batch in _keyset_batches(db, complaints, models.Complaint, batch_size):
+        for complaint in batch:
+            if complaint.attachment_path not in {a.path for a in complaint.attachments}:
+                db.add(_legacy_attachment(db, COMPLAINT, complaint, complaint.attachment_path))
+                created += 1
+    return created
+
+
+if __name__ == "__main__":
+    from Config import engine, session
+
+    parser = argparse.ArgumentParser(description="Maintain the attachments table")
+    parser.add_argument("--backfill", action="store_true", help="convert legacy document paths into attachment rows")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = session()
+    try:
+        if args.backfill:
+            print(f"Created {backfill(db)} attachment rows")
+    finally:
+        db.close()
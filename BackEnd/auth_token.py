@@ -2,6 +2,7 @@ from datetime import timedelta,datetime,timezone
 from jose import JWTError,jwt
 from fastapi import Depends,HTTPException,status
 from fastapi.security import OAuth2PasswordBearer
+from observability import metrics
 import models
 from sqlalchemy.orm import Session
 from Config import session
@@ -18,6 +19,7 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
+@metrics.timed(metrics.JWT_DURATION, "encode")
 def create_access_token(data:dict,expires_delta:timedelta| None= None):
     to_encode=data.copy()
     if expires_delta:
@@ -29,6 +31,7 @@ def create_access_token(data:dict,expires_delta:timedelta| None= None):
     return encoded_jwt
 
 
+@metrics.timed(metrics.JWT_DURATION, "decode")
 def decode_access_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
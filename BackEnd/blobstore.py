@@ -0,0 +1,178 @@
+"""Content-addressed, deduplicated upload store.
+
+Files live once under ``uploads/blobs/ab/cd/<sha256>``, a two-level fan-out
+that keeps every directory small. ``blobs`` reference-counts each content hash,
+and ``blob_paths`` maps the public ``/uploads/<category>/<name>`` paths stored
+on applications and complaints to their blob, so existing paths keep resolving.
+Files written before the store existed are still found in their old
+location until ``python blobstore.py --migrate`` moves them in.
+
+``register`` bumps the blob row before moving the file into place, and ``gc``
+deletes unreferenced blobs while holding that same row lock, so a concurrent
+upload of identical content can never lose its file.
+
+    python blobstore.py --migrate   # ingest legacy files into the store
+    python blobstore.py --gc        # delete blobs with no remaining paths
+"""
+import argparse
+import hashlib
+import os
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+import uploads
+
+CATEGORIES = ("documents", "complaints", "official")  # legacy flat directories
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(uploads.BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def public_path(category: str, filename: str) -> str:
+    return f"/uploads/{category}/{filename}"
+
+
+def _acquire(db: Session, sha256: str, size: int):
+    """Add a reference to a blob, creating its row if needed (locks the row)"""
+    stmt = insert(models.Blob).values(sha256=sha256, size=size, ref_count=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Blob.sha256],
+        set_={"ref_count": models.Blob.ref_count + 1},
+    )
+    db.execute(stmt)
+
+
+def release(db: Session, path: str):
+    """Drop the reference held by ``path``; the caller commits"""
+    mapping = db.get(models.BlobPath, path)
+    if mapping is None:
+        return
+    db.delete(mapping)
+    db.query(models.Blob).filter(models.Blob.sha256 == mapping.sha256).update(
+        {models.Blob.ref_count: models.Blob.ref_count - 1}, synchronize_session=False
+    )
+
+
+def register(db: Session, received: uploads.ReceivedFile, category: str, filename: str) -> str:
+    """
+    Store a staged upload under its content hash and map the public path to it.
+    Returns the public path. The caller commits.
+    """
+    path = public_path(category, filename)
+    existing = db.get(models.BlobPath, path)
+    if existing is not None and existing.sha256 == received.sha256:
+        uploads.discard(received.tmp_path)
+        return path
+    if existing is not None:
+        release(db, path)
+        db.flush()
+
+    _acquire(db, received.sha256, received.size)
+    target = blob_path(received.sha256)
+    if os.path.exists(target):
+        uploads.discard(received.tmp_path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(received.tmp_path, target)
+
+    db.add(models.BlobPath(path=path, sha256=received.sha256))
+    return path
+
+
+def abandon(db: Session, *received: uploads.ReceivedFile):
+    """
+    Clean up after a failed ``register`` + commit: roll back, drop the staged
+    files, and leave any blobs they may have moved into the store to ``gc`` as
+    unreferenced rows. Commits.
+    """
+    db.rollback()
+    orphaned = False
+    for item in received:
+        uploads.discard(item.tmp_path)
+        if os.path.exists(blob_path(item.sha256)):
+            stmt = insert(models.Blob).values(sha256=item.sha256, size=item.size, ref_count=0)
+            db.execute(stmt.on_conflict_do_nothing(index_elements=[models.Blob.sha256]))
+            orphaned = True
+    if orphaned:
+        db.commit()
+
+
+def lookup(db: Session, path: str):
+    """SHA-256 of the blob behind a public path, or None for legacy/unknown paths"""
+    mapping = db.get(models.BlobPath, path)
+    return mapping.sha256 if mapping is not None else None
+
+
+def locate(category: str, filename: str, sha256: str = None):
+    """File on disk for a public path (blob when ``sha256`` is known, else legacy), or None"""
+    if sha256:
+        if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+            return None
+        target = blob_path(sha256)
+    else:
+        if category not in CATEGORIES or filename != uploads.safe_filename(filename):
+            return None
+        target = os.path.join(uploads.UPLOAD_DIR, category, filename)
+    return target if os.path.isfile(target) else None
+
+
+def gc(db: Session) -> int:
+    """Delete blobs no path refers to any more; returns how many were removed"""
+    removed = 0
+    orphans = db.query(models.Blob).filter(models.Blob.ref_count <= 0).with_for_update(skip_locked=True).all()
+    for blob in orphans:
+        try:
+            os.remove(blob_path(blob.sha256))
+        except FileNotFoundError:
+            pass
+        db.delete(blob)
+        removed += 1
+    db.commit()
+    return removed
+
+
+def migrate_legacy(db: Session) -> int:
+    """Move files from the old flat upload directories into the store"""
+    migrated = 0
+    os.makedirs(uploads.STAGING_DIR, exist_ok=True)
+    for category in CATEGORIES:
+        directory = os.path.join(uploads.UPLOAD_DIR, category)
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            size = entry.stat().st_size
+            digest = hashlib.sha256()
+            with open(entry.path, "rb") as f:
+                for chunk in iter(lambda: f.read(uploads.CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            staged = os.path.join(uploads.STAGING_DIR, f".migrate-{entry.name}")
+            os.replace(entry.path, staged)
+            received = uploads.ReceivedFile(staged, size, digest.hexdigest())
+            register(db, received, category, entry.name)
+            db.commit()
+            migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    from Config import engine, session
+
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed upload store")
+    parser.add_argument("--migrate", action="store_true", help="ingest files from the legacy upload directories")
+    parser.add_argument("--gc", action="store_true", help="delete unreferenced blobs")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = session()
+    try:
+        if args.migrate:
+            print(f"Migrated {migrate_legacy(db)} files")
+        if args.gc:
+            print(f"Removed {gc(db)} unreferenced blobs")
+    finally:
+        db.close()
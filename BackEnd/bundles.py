@@ -0,0 +1,127 @@
+"""Streaming ZIP bundles of uploaded documents.
+
+The archive is produced while it is sent: ``zipfile`` writes into a tiny sink
+that hands each chunk to the ``StreamingResponse`` as soon as it is written,
+so there is no temp file and memory stays around one ``CHUNK_SIZE`` however
+large the bundle is. Files are stored rather than deflated; scans, JPEGs and
+PDFs are already compressed and recompressing them only costs CPU.
+"""
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, defer
+
+import blobstore
+import models
+import uploads
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable stream whose contents are drained after each write"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _file_for(path: str, sha256: str = None):
+    parts = (path or "").split("/")
+    if len(parts) != 4 or parts[1] != "uploads":
+        return None
+    return blobstore.locate(parts[2], parts[3], sha256)
+
+
+def _zip(entries):
+    """Yield a ZIP archive of ``(arcname, file_path)`` pairs chunk by chunk"""
+    sink = _Sink()
+    seen = set()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for arcname, file_path in entries:
+            if arcname in seen:
+                continue
+            seen.add(arcname)
+            try:
+                source = open(file_path, "rb")
+            except FileNotFoundError:
+                continue
+            with source, archive.open(arcname, "w", force_zip64=True) as dest:
+                for chunk in iter(lambda: source.read(uploads.CHUNK_SIZE), b""):
+                    dest.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _response(entries, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        _zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.zip"'},
+    )
+
+
+def application_bundle(db: Session, application_id: int) -> StreamingResponse:
+    """Every document and the official document of one application"""
+    application = db.query(models.Application).options(
+        defer(models.Application.form_data, raiseload=True)
+    ).filter(models.Application.id == application_id).first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    paths = list(application.documents)
+    if application.official_document_path:
+        paths.append(application.official_document_path)
+    hashes = dict(
+        db.query(models.BlobPath.path, models.BlobPath.sha256).filter(models.BlobPath.path.in_(paths)).all()
+    ) if paths else {}
+
+    entries = []
+    for path in paths:
+        file_path = _file_for(path, hashes.get(path))
+        if file_path is not None:
+            entries.append((path.split("/", 2)[2], file_path))
+    if not entries:
+        raise HTTPException(status_code=404, detail="No documents found for application")
+    return _response(entries, application.serial_number)
+
+
+def official_bundle(db: Session, start: date, end: date) -> StreamingResponse:
+    """Official documents of applications approved between ``start`` and ``end`` (inclusive)"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    # Approval time is the last status change, as in the dashboard stats
+    rows = db.query(
+        models.Application.serial_number,
+        models.Application.official_document_path,
+        models.BlobPath.sha256
+    ).outerjoin(
+        models.BlobPath, models.BlobPath.path == models.Application.official_document_path
+    ).filter(
+        models.Application.status == "Approved",
+        models.Application.official_document_path.isnot(None),
+        models.Application.updated_at >= datetime.combine(start, datetime.min.time()),
+        models.Application.updated_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    ).order_by(models.Application.updated_at, models.Application.id).all()
+
+    entries = []
+    for serial_number, path, sha256 in rows:
+        file_path = _file_for(path, sha256)
+        if file_path is not None:
+            entries.append((f"{serial_number}/{path.rsplit('/', 1)[-1]}", file_path))
+    if not entries:
+        raise HTTPException(status_code=404, detail="No official documents in range")
+    return _response(entries, f"official_{start.isoformat()}_{end.isoformat()}")
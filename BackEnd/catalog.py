@@ -0,0 +1,102 @@
+"""In-process service catalog.
+
+The catalog only changes through the admin service endpoints, so the public
+``/api/services`` routes are served from JSON bytes serialized once per
+version: every active service, the same list bucketed by ``office_type``, and
+each service by id. The admin write endpoints call ``invalidate``; other
+workers pick the change up after ``MAX_AGE_SECONDS``. The ETag is a digest of
+the catalog contents, so it agrees across workers.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+
+MAX_AGE_SECONDS = 60
+
+
+class CatalogSnapshot:
+    __slots__ = ("active", "by_office_type", "by_id", "etag", "loaded_at")
+
+    def __init__(self, services):
+        payloads = {
+            service.id: schemas.ServiceResponse.model_validate(service).model_dump(mode="json")
+            for service in services
+        }
+        active = [payloads[s.id] for s in services if s.is_active]
+
+        buckets = {}
+        for payload in active:
+            buckets.setdefault(payload["office_type"], []).append(payload)
+
+        self.active = json.dumps(active).encode("utf-8")
+        self.by_office_type = {key: json.dumps(value).encode("utf-8") for key, value in buckets.items()}
+        self.by_id = {key: json.dumps(value).encode("utf-8") for key, value in payloads.items()}
+        digest = hashlib.sha1(json.dumps(payloads, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.etag = f'W/"catalog-{digest}"'
+        self.loaded_at = time.monotonic()
+
+
+class ServiceCatalog:
+    def __init__(self, max_age: float = MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._snapshot = None
+        self._lock = threading.Lock()
+        # Bumped by every invalidate; a rebuild that overlapped one may have
+        # read the pre-write rows, so it is served once but never stored
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    def invalidate(self):
+        with self._generation_lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.max_age:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or time.monotonic() - snapshot.loaded_at >= self.max_age:
+                generation = self._generation
+                services = db.query(models.Service).order_by(models.Service.id).all()
+                snapshot = CatalogSnapshot(services)
+                with self._generation_lock:
+                    if generation == self._generation:
+                        self._snapshot = snapshot
+        return snapshot
+
+
+catalog = ServiceCatalog()
+
+
+def _respond(request: Request, snapshot: CatalogSnapshot, body: bytes) -> Response:
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and snapshot.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def services_response(request: Request, db: Session, office_type: str = None) -> Response:
+    snapshot = catalog.snapshot(db)
+    if office_type:
+        body = snapshot.by_office_type.get(office_type, b"[]")
+    else:
+        body = snapshot.active
+    return _respond(request, snapshot, body)
+
+
+def service_response(request: Request, db: Session, service_id: int) -> Response:
+    snapshot = catalog.snapshot(db)
+    body = snapshot.by_id.get(service_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    return _respond(request, snapshot, body)
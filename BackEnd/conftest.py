@@ -0,0 +1,61 @@
+"""Shared pytest setup for both APIs.
+
+The tests need PostgreSQL. ``main.py`` and the ``app`` package each define a
+``users`` table of their own, so they need separate databases, named by
+``TEST_DATABASE_URL`` (main.py) and ``TEST_APP_DATABASE_URL`` (app). Tests
+whose database is not configured are skipped.
+
+Both apps read ``DATABASE_URL`` once, on import, so each fixture points it
+at the right database and only then imports its app. Tests drive an app with
+``asyncio.run`` around ``async with serve(app) as client``.
+"""
+import importlib
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+
+pytest_plugins = ["observability.querycount"]
+
+
+def _import_with_database(module: str, env_name: str):
+    url = os.environ.get(env_name)
+    if not url:
+        pytest.skip(f"{env_name} is not set")
+    pytest.importorskip("fastapi")
+    os.environ["DATABASE_URL"] = url
+    return importlib.import_module(module)
+
+
+@pytest.fixture(scope="session")
+def legacy_main():
+    """The ``main.py`` module, bound to TEST_DATABASE_URL"""
+    return _import_with_database("main", "TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def app_main():
+    """The ``app.main`` module, bound to TEST_APP_DATABASE_URL"""
+    return _import_with_database("app.main", "TEST_APP_DATABASE_URL")
+
+
+@asynccontextmanager
+async def _serve(app):
+    """Run ``app``'s lifespan and yield an httpx client calling it in-process.
+
+    Requests run in the caller's task, so context variables such as the
+    ``query_budget`` counter reach the handlers, including sync ones in
+    the threadpool.
+    """
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+
+@pytest.fixture
+def serve():
+    """``async with serve(app) as client: ...``"""
+    return _serve
@@ -0,0 +1,141 @@
+"""Authenticated file delivery through short-lived signed URLs.
+
+Uploaded files are no longer public by path. ``/api/files/sign`` checks that
+the caller may read a file and returns a URL carrying the blob hash, an expiry
+and an HMAC over both, so ``/files/...`` verifies a download without any
+database lookup. Downloads honour ``Range`` and ``If-None-Match``; blob ETags
+are the content hash, so they never go stale.
+
+With ``DOWNLOAD_OFFLOAD=x-accel`` (nginx) or ``x-sendfile`` (Apache/lighttpd)
+the response only names the file and the front proxy sends the bytes, so large
+PDFs do not occupy a Python worker. For x-accel, map
+``DOWNLOAD_ACCEL_PREFIX`` to the uploads directory as an internal location.
+"""
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+from urllib.parse import quote, urlencode
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import cast, exists, or_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+import auth_token
+import blobstore
+import models
+import uploads
+
+DEFAULT_EXPIRY_SECONDS = 300
+DOWNLOAD_OFFLOAD = os.environ.get("DOWNLOAD_OFFLOAD", "")
+DOWNLOAD_ACCEL_PREFIX = os.environ.get("DOWNLOAD_ACCEL_PREFIX", "/_protected/")
+
+_signing_key = hashlib.sha256(
+    (os.environ.get("DOWNLOAD_SECRET") or auth_token.SECRET_KEY + ":downloads").encode("utf-8")
+).digest()
+
+
+def _split(path: str):
+    """'/uploads/<category>/<filename>' -> (category, filename)"""
+    parts = path.split("/")
+    if len(parts) != 4 or parts[0] or parts[1] != "uploads":
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    return parts[2], parts[3]
+
+
+def _signature(category: str, filename: str, blob: str, expires: int) -> str:
+    message = f"{category}/{filename}\n{blob}\n{expires}".encode("utf-8")
+    return hmac.new(_signing_key, message, hashlib.sha256).hexdigest()
+
+
+def expiry(seconds: int = DEFAULT_EXPIRY_SECONDS) -> int:
+    return int(time.time()) + seconds
+
+
+def sign(db: Session, path: str, expires: int = None) -> str:
+    """Signed download URL for a public ``/uploads/...`` path"""
+    category, filename = _split(path)
+    blob = blobstore.lookup(db, path) or ""
+    expires = expires or expiry()
+    query = urlencode({"b": blob, "exp": expires, "sig": _signature(category, filename, blob, expires)})
+    return f"/files/{category}/{quote(filename)}?{query}"
+
+
+def can_access(db: Session, user: models.User, path: str) -> bool:
+    if user.role == "admin":
+        return True
+    # Identical content uploaded by several owners can share a derived
+    # path, so any matching attachment owned by the user grants access
+    matches_path = or_(
+        models.Attachment.path == path,
+        models.Attachment.thumbnail_path == path,
+        models.Attachment.preview_path == path
+    )
+    owned = [
+        exists().where(
+            matches_path,
+            models.Attachment.owner_type == owner_type,
+            owner.id == models.Attachment.owner_id,
+            owner.user_id == user.id
+        )
+        for owner_type, owner in (("application", models.Application), ("complaint", models.Complaint))
+    ]
+    owned.append(exists().where(
+        models.Application.official_document_path == path,
+        models.Application.user_id == user.id
+    ))
+    owned.append(exists().where(
+        models.Complaint.attachment_path == path,
+        models.Complaint.user_id == user.id
+    ))
+    # Documents not yet moved to attachments by `python attachments.py --backfill`
+    owned.append(exists().where(
+        cast(models.Application.legacy_documents, JSONB).contains([path]),
+        models.Application.user_id == user.id
+    ))
+    return db.query(or_(*owned)).scalar()
+
+
+def _etag(file_path: str, blob: str) -> str:
+    if blob:
+        return f'"{blob}"'
+    stat = os.stat(file_path)
+    return f'"{int(stat.st_mtime)}-{stat.st_size}"'
+
+
+def file_response(request: Request, category: str, filename: str, blob: str, expires: int, sig: str) -> Response:
+    """Verify a signed URL and serve (or hand off) the file it names"""
+    # Bytes on both sides: compare_digest raises TypeError on non-ASCII str
+    expected = _signature(category, filename, blob, expires)
+    if not hmac.compare_digest(sig.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid download signature")
+    remaining = expires - int(time.time())
+    if remaining <= 0:
+        raise HTTPException(status_code=410, detail="Download link expired")
+
+    file_path = blobstore.locate(category, filename, blob)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    etag = _etag(file_path, blob)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={remaining}",
+        "Content-Disposition": f"inline; filename*=utf-8''{quote(filename)}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if DOWNLOAD_OFFLOAD == "x-accel":
+        relative = os.path.relpath(file_path, uploads.UPLOAD_DIR)
+        headers["X-Accel-Redirect"] = DOWNLOAD_ACCEL_PREFIX + quote(relative)
+        return Response(media_type=media_type, headers=headers)
+    if DOWNLOAD_OFFLOAD == "x-sendfile":
+        headers["X-Sendfile"] = os.path.abspath(file_path)
+        return Response(media_type=media_type, headers=headers)
+    return FileResponse(file_path, media_type=media_type, headers=headers)
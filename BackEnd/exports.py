@@ -0,0 +1,134 @@
+"""Streaming NDJSON/CSV exports for auditors.
+
+Rows are read through a server-side cursor (``yield_per``) and written out in
+small batches, so memory stays flat no matter how large the table is and the
+first bytes leave as soon as the first batch is fetched.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+import attachments
+import models
+from Config import session
+
+BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Columns that never leave the database in an export
+EXCLUDED_COLUMNS = {
+    "users": {"password"},
+}
+
+# The raw ``documents`` column only holds paths not yet backfilled into
+# attachments; exports carry the full list, as Application.documents does
+DOCUMENT_OWNERS = {
+    "applications": attachments.APPLICATION,
+}
+
+
+def export_columns(model):
+    excluded = EXCLUDED_COLUMNS.get(model.__tablename__, set())
+    return [column for column in model.__table__.columns if column.name not in excluded]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _with_documents(owner_type: str, names):
+    """Batch transform replacing ``documents`` with legacy plus attachment paths"""
+    id_index = names.index("id")
+    documents_index = names.index("documents")
+
+    def expand(db, batch):
+        attached = {}
+        for owner_id, path in db.execute(
+            select(models.Attachment.owner_id, models.Attachment.path)
+            .where(
+                models.Attachment.owner_type == owner_type,
+                models.Attachment.owner_id.in_([row[id_index] for row in batch]),
+            )
+            .order_by(models.Attachment.created_at, models.Attachment.id)
+        ):
+            attached.setdefault(owner_id, []).append(path)
+
+        rows = []
+        for row in batch:
+            row = list(row)
+            documents = list(row[documents_index] or [])
+            documents.extend(p for p in attached.get(row[id_index], ()) if p not in documents)
+            row[documents_index] = documents
+            rows.append(row)
+        return rows
+    return expand
+
+
+def _stream_rows(statement, expand=None):
+    """Yield result batches from a dedicated session over a server-side cursor"""
+    db = session()
+    try:
+        result = db.execute(statement.execution_options(yield_per=BATCH_SIZE))
+        for batch in result.partitions():
+            # One extra query per batch, never per row
+            yield expand(db, batch) if expand else batch
+    finally:
+        db.close()
+
+
+def _ndjson(statement, names, expand=None):
+    for batch in _stream_rows(statement, expand):
+        yield "".join(
+            json.dumps(dict(zip(names, row)), default=_json_default) + "\n"
+            for row in batch
+        )
+
+
+def _csv(statement, names, expand=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    yield buffer.getvalue()
+    for batch in _stream_rows(statement, expand):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+
+
+def stream_export(model, filters, fmt: str, filename: str) -> StreamingResponse:
+    """Build a StreamingResponse that dumps ``model`` rows matching ``filters``"""
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Use: {list(MEDIA_TYPES)}")
+
+    columns = export_columns(model)
+    names = [column.name for column in columns]
+    statement = select(*columns).where(*filters).order_by(model.id)
+    owner_type = DOCUMENT_OWNERS.get(model.__tablename__)
+    expand = _with_documents(owner_type, names) if owner_type else None
+
+    body = _ndjson(statement, names, expand) if fmt == "ndjson" else _csv(statement, names, expand)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -1,8 +1,11 @@
 import bcrypt
 
+from observability import metrics
+
 
 class Hash():
     @staticmethod
+    @metrics.timed(metrics.PASSWORD_HASH_DURATION, "hash")
     def bcrypt(password:str):
       password_bytes= password[:72].encode('utf-8')
       hashed= bcrypt.hashpw(password_bytes,bcrypt.gensalt())
@@ -11,6 +14,7 @@ class Hash():
 
 
     @staticmethod
+    @metrics.timed(metrics.PASSWORD_HASH_DURATION, "verify")
     def verify(hashed_password,plain_password):
        plain_password_bytes=plain_password[:72].encode('utf-8')
        return bcrypt.checkpw(plain_password_bytes,hashed_password.encode('utf-8'))
@@ -1,36 +1,66 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Query
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
 from fastapi.responses import FileResponse
 import models
 import schemas
 import auth_token
 import hashing
-from sqlalchemy.orm import Session
-from datetime import timedelta, datetime
+import stats
+import pagination
+import exports
+import serials
+import tracking
+import serial_filter
+import catalog
+import uploads
+import blobstore
+import attachments
+import downloads
+import resumable
+import thumbnails
+import bundles
+from observability import metrics
+from observability import querycount
+import seeding
+from sqlalchemy.orm import Session, defer, joinedload
+from datetime import timedelta, datetime, date
 from Config import engine, session
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
 import os
-import shutil
-import random
-import string
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi.concurrency import run_in_threadpool
 
-UPLOAD_DIR = "uploads"
+UPLOAD_DIR = uploads.UPLOAD_DIR
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(f"{UPLOAD_DIR}/documents", exist_ok=True)
 os.makedirs(f"{UPLOAD_DIR}/complaints", exist_ok=True)
 os.makedirs(f"{UPLOAD_DIR}/official", exist_ok=True)
+os.makedirs(uploads.STAGING_DIR, exist_ok=True)
+os.makedirs(resumable.RESUMABLE_DIR, exist_ok=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(serial_filter.rebuild_with, session)
+    rebuild_task = asyncio.create_task(serial_filter.rebuild_periodically(session))
+    cleanup_task = asyncio.create_task(resumable.gc_periodically())
+    yield
+    rebuild_task.cancel()
+    cleanup_task.cancel()
+    thumbnails.shutdown()
+
 
 app = FastAPI(
     title="JanaSewa API",
     description="Smart Citizen Service Portal for Nepal",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 models.Base.metadata.create_all(bind=engine)
-
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+metrics.instrument_engine(engine, "main")
 
 app.add_middleware(
     CORSMiddleware,
@@ -39,7 +69,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER],
 )
+# Dev only: print routes whose SQL repeats per row (N+1)
+if os.environ.get("QUERY_DEBUG") == "1":
+    app.add_middleware(querycount.NPlusOneMiddleware)
+# Outermost, so its timings include CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
@@ -73,10 +109,7 @@ def require_admin(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 
-def generate_serial():
-    year = datetime.now().year
-    random_part = ''.join(random.choices(string.digits, k=4))
-    return f"JS-{year}-{random_part}"
+serial_allocator = serials.SerialAllocator(engine)
 
 
 @app.get("/", tags=["Root"])
@@ -99,6 +132,7 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         role=user.role if user.role in ["citizen", "admin"] else "citizen"
     )
     db.add(new_user)
+    stats.bump(db, stats.USERS)
     db.commit()
     db.refresh(new_user)
     return new_user
@@ -136,23 +170,18 @@ def get_me(current_user: models.User = Depends(get_current_user)):
 
 @app.get("/api/services", response_model=List[schemas.ServiceResponse], tags=["Services"])
 def get_services(
+    request: Request,
     office_type: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all active services"""
-    query = db.query(models.Service).filter(models.Service.is_active == True)
-    if office_type:
-        query = query.filter(models.Service.office_type == office_type)
-    return query.all()
+    """Get all active services (served from the in-memory catalog)"""
+    return catalog.services_response(request, db, office_type)
 
 
 @app.get("/api/services/{service_id}", response_model=schemas.ServiceResponse, tags=["Services"])
-def get_service(service_id: int, db: Session = Depends(get_db)):
-    """Get service by ID"""
-    service = db.query(models.Service).filter(models.Service.id == service_id).first()
-    if not service:
-        raise HTTPException(status_code=404, detail="Service not found")
-    return service
+def get_service(service_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get service by ID (served from the in-memory catalog)"""
+    return catalog.service_response(request, db, service_id)
 
 
 @app.post("/api/admin/services", response_model=schemas.ServiceResponse, tags=["Admin - Services"])
@@ -164,7 +193,9 @@ def create_service(
     """Admin: Create new service"""
     new_service = models.Service(**service.model_dump())
     db.add(new_service)
+    stats.bump(db, stats.SERVICES)
     db.commit()
+    catalog.catalog.invalidate()
     db.refresh(new_service)
     return new_service
 
@@ -186,6 +217,7 @@ def update_service(
         setattr(db_service, key, value)
     
     db.commit()
+    catalog.catalog.invalidate()
     db.refresh(db_service)
     return db_service
 
@@ -201,7 +233,9 @@ def delete_service(
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     db.delete(service)
+    stats.bump(db, stats.SERVICES, -1)
     db.commit()
+    catalog.catalog.invalidate()
     return {"message": "Service deleted successfully"}
 
 
@@ -216,28 +250,28 @@ def create_application(
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    serial = generate_serial()
-    while db.query(models.Application).filter(models.Application.serial_number == serial).first():
-        serial = generate_serial()
-    
     new_app = models.Application(
-        serial_number=serial,
+        serial_number=serial_allocator.next_serial(),
         user_id=current_user.id,
         **application.model_dump()
     )
     db.add(new_app)
+    stats.record_application_created(db, "Submitted")
     db.commit()
     db.refresh(new_app)
+    serial_filter.add(new_app.serial_number)
     return new_app
 
 
-@app.get("/api/applications", response_model=List[schemas.ApplicationResponse], tags=["Applications"])
+@app.get("/api/applications", response_model=List[schemas.ApplicationSummary], tags=["Applications"])
 def get_my_applications(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Get current user's applications"""
-    return db.query(models.Application).filter(
+    """Get current user's applications (without form_data; see GET /api/applications/{id})"""
+    return db.query(models.Application).options(
+        defer(models.Application.form_data, raiseload=True)
+    ).filter(
         models.Application.user_id == current_user.id
     ).order_by(models.Application.created_at.desc()).all()
 
@@ -249,7 +283,9 @@ def get_application(
     current_user: models.User = Depends(get_current_user)
 ):
     """Get specific application"""
-    app = db.query(models.Application).filter(
+    app = db.query(models.Application).options(
+        joinedload(models.Application.service)
+    ).filter(
         models.Application.id == application_id,
         models.Application.user_id == current_user.id
     ).first()
@@ -261,70 +297,195 @@ def get_application(
 @app.post("/api/applications/{application_id}/upload", tags=["Applications"])
 async def upload_application_document(
     application_id: int,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Upload one ("file") or more ("files") documents for application"""
+    incoming = ([file] if file else []) + (files or [])
+    if not incoming:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+
+    app = await run_in_threadpool(
+        db.query(models.Application).filter(
+            models.Application.id == application_id,
+            models.Application.user_id == current_user.id
+        ).first
+    )
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    received = []
+    try:
+        for upload in incoming:
+            filename = f"{application_id}_{datetime.now().timestamp()}_{uploads.safe_filename(upload.filename)}"
+            received.append((upload, filename, await uploads.save_upload(upload, "documents")))
+    except HTTPException:
+        for _, _, stored in received:
+            await uploads.run_io(uploads.discard, stored.tmp_path)
+        raise
+    
+    def attach():
+        try:
+            rows = [
+                attachments.add(db, attachments.APPLICATION, application_id, stored, "documents",
+                                filename, upload.filename, upload.content_type, current_user.id)
+                for upload, filename, stored in received
+            ]
+            db.commit()
+        except Exception:
+            blobstore.abandon(db, *(stored for _, _, stored in received))
+            raise
+        added = [schemas.AttachmentResponse.model_validate(row) for row in rows]
+        thumbnails.schedule(session, added)
+        return added
+    
+    added = await run_in_threadpool(attach)
+    
+    return {"message": "Document uploaded", "path": added[-1].path, "attachments": added}
+
+
+@app.post("/api/applications/{application_id}/uploads", response_model=schemas.UploadSessionResponse, tags=["Applications"])
+def create_upload_session(
+    application_id: int,
+    upload_data: schemas.UploadSessionCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Upload document for application"""
+    """Start a resumable upload of a large document for application"""
     app = db.query(models.Application).filter(
         models.Application.id == application_id,
         models.Application.user_id == current_user.id
     ).first()
     if not app:
         raise HTTPException(status_code=404, detail="Application not found")
-    
-    filename = f"{application_id}_{datetime.now().timestamp()}_{file.filename}"
-    filepath = f"{UPLOAD_DIR}/documents/{filename}"
-    
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    docs = app.documents or []
-    docs.append(f"/uploads/documents/{filename}")
-    app.documents = docs
-    db.commit()
-    
-    return {"message": "Document uploaded", "path": f"/uploads/documents/{filename}"}
+    return resumable.create(
+        current_user.id, application_id, upload_data.filename, upload_data.size,
+        upload_data.content_type, upload_data.sha256
+    )
 
 
-@app.get("/api/track/{serial_number}", response_model=schemas.TrackingResponse, tags=["Tracking"])
-def track_application(serial_number: str, db: Session = Depends(get_db)):
-    """Track application by serial number (public)"""
-    app = db.query(models.Application).filter(
-        models.Application.serial_number == serial_number
-    ).first()
-    
+@app.get("/api/uploads/{upload_id}", response_model=schemas.UploadSessionResponse, tags=["Applications"])
+def get_upload_session(upload_id: str, current_user: models.User = Depends(get_current_user)):
+    """Get the committed offset of a resumable upload (resume from here)"""
+    return resumable.status(upload_id, current_user.id)
+
+
+@app.put("/api/uploads/{upload_id}", response_model=schemas.UploadSessionResponse, tags=["Applications"])
+async def put_upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Upload the raw bytes of one chunk at offset; send its SHA-256 in X-Chunk-SHA256"""
+    checksum = request.headers.get("x-chunk-sha256", "")
+    return await resumable.write_chunk(upload_id, current_user.id, offset, request, checksum)
+
+
+@app.post("/api/uploads/{upload_id}/finalize", tags=["Applications"])
+async def finalize_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Verify a completed resumable upload and attach it to its application"""
+    meta, _ = await uploads.run_io(resumable.load, upload_id, current_user.id)
+    application_id = meta["application_id"]
+    app = await run_in_threadpool(
+        db.query(models.Application).filter(
+            models.Application.id == application_id,
+            models.Application.user_id == current_user.id
+        ).first
+    )
     if not app:
         raise HTTPException(status_code=404, detail="Application not found")
-    
-    service = db.query(models.Service).filter(models.Service.id == app.service_id).first()
-    
-    return {
-        "serial_number": app.serial_number,
-        "applicant_name": app.applicant_name,
-        "service_title": service.title if service else "Unknown Service",
-        "status": app.status,
-        "created_at": app.created_at,
-        "updated_at": app.updated_at,
-        "admin_remarks": app.admin_remarks,
-        "official_document_path": app.official_document_path
-    }
+
+    meta, stored = await resumable.assemble(upload_id, current_user.id)
+    filename = f"{application_id}_{datetime.now().timestamp()}_{uploads.safe_filename(meta['filename'])}"
+
+    def attach():
+        try:
+            row = attachments.add(db, attachments.APPLICATION, application_id, stored, "documents",
+                                  filename, meta["filename"], meta["content_type"], current_user.id)
+            db.commit()
+        except Exception:
+            blobstore.abandon(db, stored)
+            raise
+        added = schemas.AttachmentResponse.model_validate(row)
+        thumbnails.schedule(session, [added])
+        return added
+
+    added = await run_in_threadpool(attach)
+
+    return {"message": "Document uploaded", "path": added.path, "attachments": [added]}
+
+
+@app.get("/api/files/sign", tags=["Files"])
+def sign_file_url(
+    path: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Get a short-lived download URL for an uploaded file you may read"""
+    if not downloads.can_access(db, current_user, path):
+        raise HTTPException(status_code=404, detail="File not found")
+    expires_at = downloads.expiry()
+    return {"url": downloads.sign(db, path, expires_at), "expires_at": expires_at}
+
+
+@app.get("/files/{category}/{filename}", tags=["Files"])
+def download_file(
+    category: str,
+    filename: str,
+    request: Request,
+    b: str = "",
+    exp: int = 0,
+    sig: str = ""
+):
+    """Download a file through a signed URL (supports Range and If-None-Match)"""
+    return downloads.file_response(request, category, filename, b, exp, sig)
+
+
+@app.get("/api/track/{serial_number}", response_model=schemas.TrackingResponse, tags=["Tracking"])
+def track_application(serial_number: str, request: Request, db: Session = Depends(get_db)):
+    """Track application by serial number (public, cached, supports conditional GET)"""
+    return tracking.tracking_response(request, db, serial_number)
 
 
-@app.get("/api/admin/applications", response_model=List[schemas.ApplicationResponse], tags=["Admin - Applications"])
+@app.get("/api/admin/applications", response_model=List[schemas.ApplicationSummary], tags=["Admin - Applications"])
 def get_all_applications(
+    response: Response,
     status: Optional[str] = None,
     service_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     admin: models.User = Depends(require_admin)
 ):
-    """Admin: Get all applications"""
-    query = db.query(models.Application)
+    """Admin: Get applications, newest first, without form_data; paged when limit or cursor is given (next page cursor in X-Next-Cursor)"""
+    query = db.query(models.Application).options(defer(models.Application.form_data, raiseload=True))
     if status:
         query = query.filter(models.Application.status == status)
     if service_id:
         query = query.filter(models.Application.service_id == service_id)
-    return query.order_by(models.Application.created_at.desc()).all()
+    return pagination.paginate(query, models.Application, response, cursor, limit)
+
+
+@app.get("/api/admin/applications/{application_id}", response_model=schemas.ApplicationWithService, tags=["Admin - Applications"])
+def get_application_admin(
+    application_id: int,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Get one application with its form_data and service"""
+    app = db.query(models.Application).options(
+        joinedload(models.Application.service)
+    ).filter(models.Application.id == application_id).first()
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return app
 
 
 @app.put("/api/admin/applications/{application_id}/status", response_model=schemas.ApplicationResponse, tags=["Admin - Applications"])
@@ -335,7 +496,10 @@ def update_application_status(
     admin: models.User = Depends(require_admin)
 ):
     """Admin: Update application status"""
-    app = db.query(models.Application).filter(models.Application.id == application_id).first()
+    # Row lock: the rollup delta depends on the status we read here
+    app = db.query(models.Application).filter(
+        models.Application.id == application_id
+    ).with_for_update().first()
     if not app:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -343,12 +507,14 @@ def update_application_status(
     if update.status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Invalid status. Use: {valid_statuses}")
     
+    stats.record_application_update(db, app.status, app.updated_at, update.status)
     app.status = update.status
     if update.admin_remarks:
         app.admin_remarks = update.admin_remarks
     app.updated_at = datetime.utcnow()
     
     db.commit()
+    tracking.invalidate(app.serial_number)
     db.refresh(app)
     return app
 
@@ -361,20 +527,34 @@ async def upload_official_document(
     admin: models.User = Depends(require_admin)
 ):
     """Admin: Upload official approved document"""
-    app = db.query(models.Application).filter(models.Application.id == application_id).first()
+    app = await run_in_threadpool(
+        db.query(models.Application).filter(models.Application.id == application_id).first
+    )
     if not app:
         raise HTTPException(status_code=404, detail="Application not found")
     
-    filename = f"official_{app.serial_number}_{file.filename}"
-    filepath = f"{UPLOAD_DIR}/official/{filename}"
+    filename = f"official_{app.serial_number}_{uploads.safe_filename(file.filename)}"
+    received = await uploads.save_upload(file, "official")
     
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    def attach():
+        try:
+            # Re-read under a row lock: the rollup delta depends on status and updated_at
+            db.refresh(app, with_for_update=True)
+            if app.official_document_path:
+                blobstore.release(db, app.official_document_path)
+                db.flush()
+            app.official_document_path = blobstore.register(db, received, "official", filename)
+            stats.record_application_update(db, app.status, app.updated_at, app.status)
+            db.commit()
+        except Exception:
+            blobstore.abandon(db, received)
+            raise
+        return app.official_document_path
     
-    app.official_document_path = f"/uploads/official/{filename}"
-    db.commit()
+    path = await run_in_threadpool(attach)
+    tracking.invalidate(app.serial_number)
     
-    return {"message": "Official document uploaded", "path": app.official_document_path}
+    return {"message": "Official document uploaded", "path": path, "size": received.size, "sha256": received.sha256}
 
 
 @app.post("/api/complaints", response_model=schemas.ComplaintResponse, tags=["Complaints"])
@@ -389,60 +569,122 @@ def create_complaint(
         **complaint.model_dump()
     )
     db.add(new_complaint)
+    stats.record_complaint_created(db, "Pending")
     db.commit()
     db.refresh(new_complaint)
     return new_complaint
 
 
-@app.get("/api/complaints", response_model=List[schemas.ComplaintResponse], tags=["Complaints"])
+@app.get("/api/complaints", response_model=List[schemas.ComplaintSummary], tags=["Complaints"])
 def get_my_complaints(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Get current user's complaints"""
-    return db.query(models.Complaint).filter(
+    """Get current user's complaints (without description; see GET /api/complaints/{id})"""
+    return db.query(models.Complaint).options(
+        defer(models.Complaint.description, raiseload=True)
+    ).filter(
         models.Complaint.user_id == current_user.id
     ).order_by(models.Complaint.created_at.desc()).all()
 
 
-@app.post("/api/complaints/{complaint_id}/upload", tags=["Complaints"])
-async def upload_complaint_attachment(
+@app.get("/api/complaints/{complaint_id}", response_model=schemas.ComplaintResponse, tags=["Complaints"])
+def get_complaint(
     complaint_id: int,
-    file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """Upload attachment for complaint"""
+    """Get specific complaint"""
     complaint = db.query(models.Complaint).filter(
         models.Complaint.id == complaint_id,
         models.Complaint.user_id == current_user.id
     ).first()
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
-    
-    filename = f"complaint_{complaint_id}_{file.filename}"
-    filepath = f"{UPLOAD_DIR}/complaints/{filename}"
-    
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    complaint.attachment_path = f"/uploads/complaints/{filename}"
-    db.commit()
-    
-    return {"message": "Attachment uploaded", "path": complaint.attachment_path}
+    return complaint
 
 
-@app.get("/api/admin/complaints", response_model=List[schemas.ComplaintResponse], tags=["Admin - Complaints"])
+@app.post("/api/complaints/{complaint_id}/upload", tags=["Complaints"])
+async def upload_complaint_attachment(
+    complaint_id: int,
+    file: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Upload one ("file") or more ("files") attachments for complaint"""
+    incoming = ([file] if file else []) + (files or [])
+    if not incoming:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+
+    complaint = await run_in_threadpool(
+        db.query(models.Complaint).filter(
+            models.Complaint.id == complaint_id,
+            models.Complaint.user_id == current_user.id
+        ).first
+    )
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    
+    received = []
+    try:
+        for upload in incoming:
+            filename = f"complaint_{complaint_id}_{datetime.now().timestamp()}_{uploads.safe_filename(upload.filename)}"
+            received.append((upload, filename, await uploads.save_upload(upload, "complaints")))
+    except HTTPException:
+        for _, _, stored in received:
+            await uploads.run_io(uploads.discard, stored.tmp_path)
+        raise
+    
+    def attach():
+        try:
+            rows = [
+                attachments.add(db, attachments.COMPLAINT, complaint_id, stored, "complaints",
+                                filename, upload.filename, upload.content_type, current_user.id)
+                for upload, filename, stored in received
+            ]
+            # attachment_path keeps pointing at the latest file for older clients
+            complaint.attachment_path = rows[-1].path
+            db.commit()
+        except Exception:
+            blobstore.abandon(db, *(stored for _, _, stored in received))
+            raise
+        added = [schemas.AttachmentResponse.model_validate(row) for row in rows]
+        thumbnails.schedule(session, added)
+        return added
+    
+    added = await run_in_threadpool(attach)
+    
+    return {"message": "Attachment uploaded", "path": added[-1].path, "attachments": added}
+
+
+@app.get("/api/admin/complaints", response_model=List[schemas.ComplaintSummary], tags=["Admin - Complaints"])
 def get_all_complaints(
+    response: Response,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     admin: models.User = Depends(require_admin)
 ):
-    """Admin: Get all complaints"""
-    query = db.query(models.Complaint)
+    """Admin: Get complaints, newest first, without description; paged when limit or cursor is given (next page cursor in X-Next-Cursor)"""
+    query = db.query(models.Complaint).options(defer(models.Complaint.description, raiseload=True))
     if status:
         query = query.filter(models.Complaint.status == status)
-    return query.order_by(models.Complaint.created_at.desc()).all()
+    return pagination.paginate(query, models.Complaint, response, cursor, limit)
+
+
+@app.get("/api/admin/complaints/{complaint_id}", response_model=schemas.ComplaintResponse, tags=["Admin - Complaints"])
+def get_complaint_admin(
+    complaint_id: int,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Get one complaint with its description"""
+    complaint = db.query(models.Complaint).filter(models.Complaint.id == complaint_id).first()
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    return complaint
 
 
 @app.put("/api/admin/complaints/{complaint_id}", response_model=schemas.ComplaintResponse, tags=["Admin - Complaints"])
@@ -453,11 +695,15 @@ def update_complaint(
     admin: models.User = Depends(require_admin)
 ):
     """Admin: Update complaint status and response"""
-    complaint = db.query(models.Complaint).filter(models.Complaint.id == complaint_id).first()
+    # Row lock: the rollup delta depends on the status we read here
+    complaint = db.query(models.Complaint).filter(
+        models.Complaint.id == complaint_id
+    ).with_for_update().first()
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
     if update.status:
+        stats.record_complaint_update(db, complaint.status, update.status)
         complaint.status = update.status
     if update.admin_response:
         complaint.admin_response = update.admin_response
@@ -498,6 +744,7 @@ def create_notice(
     """Admin: Create notice"""
     new_notice = models.Notice(**notice.model_dump())
     db.add(new_notice)
+    stats.bump(db, stats.NOTICES)
     db.commit()
     db.refresh(new_notice)
     return new_notice
@@ -535,6 +782,7 @@ def delete_notice(
     if not notice:
         raise HTTPException(status_code=404, detail="Notice not found")
     db.delete(notice)
+    stats.bump(db, stats.NOTICES, -1)
     db.commit()
     return {"message": "Notice deleted successfully"}
 
@@ -544,29 +792,38 @@ def get_admin_stats(
     db: Session = Depends(get_db),
     admin: models.User = Depends(require_admin)
 ):
-    """Admin: Get dashboard statistics"""
+    """Admin: Get dashboard statistics (served from the stats_rollup table)"""
+    return stats.read_stats(db)
+
+
+@app.get("/api/admin/metrics/tracking-filter", tags=["Admin - Dashboard"])
+def get_tracking_filter_metrics(admin: models.User = Depends(require_admin)):
+    """Admin: Size and false-positive rate of the tracking serial filter"""
+    return serial_filter.metrics()
+
+
+@app.get("/metrics", tags=["Metrics"])
+def get_prometheus_metrics(request: Request):
+    """Request, SQL, pool, bcrypt and JWT metrics in Prometheus text format (METRICS_TOKEN or allowed networks only)"""
+    return metrics.metrics_endpoint(request)
+
+
+@app.get("/api/admin/metrics/thumbnails", tags=["Admin - Dashboard"])
+def get_thumbnail_metrics(admin: models.User = Depends(require_admin)):
+    """Admin: Thumbnail pool size, queue depth and pending jobs"""
+    return thumbnails.metrics()
+
+
+@app.post("/api/admin/stats/rebuild", tags=["Admin - Dashboard"])
+def rebuild_admin_stats(
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Recompute dashboard statistics from scratch and report drift"""
+    drift = stats.rebuild(db)
     return {
-        "total_users": db.query(models.User).count(),
-        "total_services": db.query(models.Service).count(),
-        "total_applications": db.query(models.Application).count(),
-        "pending_applications": db.query(models.Application).filter(
-            models.Application.status.in_(["Submitted", "Under Review"])
-        ).count(),
-        "approved_applications": db.query(models.Application).filter(
-            models.Application.status == "Approved"
-        ).count(),
-        "rejected_applications": db.query(models.Application).filter(
-            models.Application.status == "Rejected"
-        ).count(),
-        "total_complaints": db.query(models.Complaint).count(),
-        "pending_complaints": db.query(models.Complaint).filter(
-            models.Complaint.status == "Pending"
-        ).count(),
-        "total_notices": db.query(models.Notice).count(),
-        "approved_today": db.query(models.Application).filter(
-            models.Application.status == "Approved",
-            models.Application.updated_at >= datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        ).count()
+        "message": "Statistics rebuilt",
+        "drift": {key: {"stored": stored, "actual": actual} for key, (stored, actual) in drift.items()}
     }
 
 
@@ -580,6 +837,65 @@ def get_all_users(
     return users
 
 
+@app.get("/api/admin/export/applications", tags=["Admin - Exports"])
+def export_applications(
+    status: Optional[str] = None,
+    service_id: Optional[int] = None,
+    format: str = Query("ndjson", description="ndjson or csv"),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Stream all applications as NDJSON or CSV"""
+    filters = []
+    if status:
+        filters.append(models.Application.status == status)
+    if service_id:
+        filters.append(models.Application.service_id == service_id)
+    return exports.stream_export(models.Application, filters, format, "applications")
+
+
+@app.get("/api/admin/export/complaints", tags=["Admin - Exports"])
+def export_complaints(
+    status: Optional[str] = None,
+    format: str = Query("ndjson", description="ndjson or csv"),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Stream all complaints as NDJSON or CSV"""
+    filters = []
+    if status:
+        filters.append(models.Complaint.status == status)
+    return exports.stream_export(models.Complaint, filters, format, "complaints")
+
+
+@app.get("/api/admin/export/users", tags=["Admin - Exports"])
+def export_users(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Stream all users (without password hashes) as NDJSON or CSV"""
+    return exports.stream_export(models.User, [], format, "users")
+
+
+@app.get("/api/admin/applications/{application_id}/bundle", tags=["Admin - Exports"])
+def download_application_bundle(
+    application_id: int,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Stream all documents of an application as one ZIP"""
+    return bundles.application_bundle(db, application_id)
+
+
+@app.get("/api/admin/export/official-documents", tags=["Admin - Exports"])
+def download_official_documents(
+    start: date,
+    end: date,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin)
+):
+    """Admin: Stream official documents of applications approved in a date range as one ZIP"""
+    return bundles.official_bundle(db, start, end)
+
+
 @app.post("/api/seed", tags=["Utility"])
 def seed_data(db: Session = Depends(get_db)):
     """Seed initial data (services and admin user)"""
@@ -587,111 +903,15 @@ def seed_data(db: Session = Depends(get_db)):
     if db.query(models.Service).count() > 0:
         return {"message": "Data already seeded"}
     
-    admin = models.User(
-        full_name="Admin User",
-        email="admin@janasewa.gov.np",
-        password=hashing.Hash.bcrypt("admin123"),
-        role="admin"
-    )
-    db.add(admin)
-    
-    services = [
-        {
-            "title": "Citizenship Certificate",
-            "description": "Apply for new citizenship certificate or renewal",
-            "required_documents": ["Birth Certificate", "Father/Mother's Citizenship", "Ward Recommendation", "2 Passport Photos"],
-            "office_type": "dao",
-            "fee": 100.0,
-            "estimated_days": 15
-        },
-        {
-            "title": "Driving License",
-            "description": "Apply for new driving license or renewal",
-            "required_documents": ["Citizenship Copy", "Medical Certificate", "Training Certificate", "2 Passport Photos"],
-            "office_type": "yatayat",
-            
-            "estimated_days": 30
-        },
-        {
-            "title": "Passport",
-            "description": "Apply for new passport or renewal",
-            "required_documents": ["Citizenship Copy", "Old Passport (if renewal)", "4 Passport Photos", "Online Form Print"],
-            "office_type": "passport",
-            "fee": 5000.0,
-            "estimated_days": 15
-        },
-        {
-            "title": "Tax Clearance",
-            "description": "Get tax clearance certificate",
-            "required_documents": ["PAN Certificate", "Previous Year Returns", "Bank Statement"],
-            "office_type": "tax",
-            "fee": 200.0,
-            "estimated_days": 7
-        },
-        {
-            "title": "Land Registration",
-            "description": "Register land ownership or transfer",
-            "required_documents": ["Land Ownership Certificate", "Citizenship Copy", "Tax Receipt", "Agreement Papers"],
-            "office_type": "ward",
-            "fee": 1000.0,
-            "estimated_days": 30
-        },
-        {
-            "title": "Birth Certificate",
-            "description": "Apply for birth registration certificate",
-            "required_documents": ["Hospital Birth Record", "Parent's Citizenship", "Ward Recommendation"],
-            "office_type": "ward",
-            "fee": 50.0,
-            "estimated_days": 3
-        },
-        {
-            "title": "Marriage Certificate",
-            "description": "Register marriage and get certificate",
-            "required_documents": ["Both Party's Citizenship", "Passport Photos", "Witnesses"],
-            "office_type": "ward",
-            "fee": 100.0,
-            "estimated_days": 7
-        },
-        {
-            "title": "Business Registration",
-            "description": "Register new business or company",
-            "required_documents": ["Citizenship Copy", "PAN Certificate", "Rent Agreement", "Photos"],
-            "office_type": "municipality",
-            "fee": 2000.0,
-            "estimated_days": 15
-        }
-    ]
-    
-    for s in services:
-        db.add(models.Service(**s))
-    
-    notices = [
-        {
-            "title": "National Scholarship Program 2082",
-            "description": "Applications open for meritorious students from marginalized communities. Apply before Baisakh 15.",
-            "category": "Scholarship"
-        },
-        {
-            "title": "Farmer Subsidy for Khet Land",
-            "description": "Government subsidy of up to Rs 50,000 for small-scale farmers for seeds and fertilizers.",
-            "category": "Agriculture"
-        },
-        {
-            "title": "New Online Passport System",
-            "description": "Department of Passports has launched a new online system effective from Magh 1.",
-            "category": "Announcement"
-        }
-    ]
-    
-    for n in notices:
-        db.add(models.Notice(**n))
-    
-    db.commit()
+    seeding.seed_demo(db)
+    stats.rebuild(db)
+    catalog.catalog.invalidate()
     
+    admin_email, admin_password = seeding.DEMO_ADMIN
     return {
         "message": "Data seeded successfully",
-        "admin_email": "admin@janasewa.gov.np",
-        "admin_password": "admin123"
+        "admin_email": admin_email,
+        "admin_password": admin_password
     }
 
 
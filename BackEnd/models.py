@@ -1,20 +1,11 @@
-from sqlalchemy import Column, String, Integer, Boolean, Date, ForeignKey, DateTime, Text, JSON, Float
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, Date, ForeignKey, DateTime, Text, JSON, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
-import random
-import string
 
 Base = declarative_base()
 
 
-def generate_serial_number():
-    """Generate unique serial number like JS-2026-0001"""
-    year = datetime.now().year
-    random_part = ''.join(random.choices(string.digits, k=4))
-    return f"JS-{year}-{random_part}"
-
-
 class User(Base):
     __tablename__ = "users"
 
@@ -26,8 +17,9 @@ class User(Base):
     role = Column(String(20), default="citizen")
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    applications = relationship("Application", back_populates="user")
-    complaints = relationship("Complaint", back_populates="user")
+    # Never serialized; raise instead of silently loading per row
+    applications = relationship("Application", back_populates="user", lazy="raise", passive_deletes=True)
+    complaints = relationship("Complaint", back_populates="user", lazy="raise", passive_deletes=True)
 
 
 class Service(Base):
@@ -43,7 +35,7 @@ class Service(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    applications = relationship("Application", back_populates="service")
+    applications = relationship("Application", back_populates="service", lazy="raise", passive_deletes=True)
 
 
 class Application(Base):
@@ -63,7 +55,8 @@ class Application(Base):
     
     form_data = Column(JSON, default=dict)
     
-    documents = Column(JSON, default=list)
+    # Pre-attachments document list; emptied by `python attachments.py --backfill`
+    legacy_documents = Column("documents", JSON, default=list)
     
     status = Column(String(50), default="Submitted")
     remarks = Column(Text, nullable=True)
@@ -73,8 +66,30 @@ class Application(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    user = relationship("User", back_populates="applications")
-    service = relationship("Service", back_populates="applications")
+    user = relationship("User", back_populates="applications", lazy="raise")
+    # Only ApplicationWithService needs it; load with joinedload() there
+    service = relationship("Service", back_populates="applications", lazy="raise")
+    attachments = relationship(
+        "Attachment",
+        primaryjoin="and_(Attachment.owner_type == 'application', foreign(Attachment.owner_id) == Application.id)",
+        order_by="[Attachment.created_at, Attachment.id]",
+        lazy="selectin",
+        viewonly=True,
+    )
+
+    @property
+    def documents(self):
+        """Document paths: any not yet backfilled legacy entries, then attachments"""
+        paths = list(self.legacy_documents or [])
+        paths.extend(a.path for a in self.attachments if a.path not in paths)
+        return paths
+
+    # Keyset pagination indexes for the admin queue (see pagination.py)
+    __table_args__ = (
+        Index("ix_applications_created_id", "created_at", "id"),
+        Index("ix_applications_status_created_id", "status", "created_at", "id"),
+        Index("ix_applications_service_created_id", "service_id", "created_at", "id"),
+    )
 
 
 class Complaint(Base):
@@ -91,7 +106,19 @@ class Complaint(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    user = relationship("User", back_populates="complaints")
+    user = relationship("User", back_populates="complaints", lazy="raise")
+    attachments = relationship(
+        "Attachment",
+        primaryjoin="and_(Attachment.owner_type == 'complaint', foreign(Attachment.owner_id) == Complaint.id)",
+        order_by="[Attachment.created_at, Attachment.id]",
+        lazy="selectin",
+        viewonly=True,
+    )
+
+    __table_args__ = (
+        Index("ix_complaints_created_id", "created_at", "id"),
+        Index("ix_complaints_status_created_id", "status", "created_at", "id"),
+    )
 
 
 class Notice(Base):
@@ -104,4 +131,62 @@ class Notice(Base):
     deadline = Column(Date, nullable=True)
     attachment_path = Column(String(500), nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class StatsRollup(Base):
+    """Pre-aggregated dashboard counters, kept in step by the write paths in stats.py"""
+    __tablename__ = "stats_rollup"
+
+    key = Column(String(150), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SerialCounter(Base):
+    """Next unreserved application serial per year, handed out in blocks by serials.py"""
+    __tablename__ = "serial_counters"
+
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    next_value = Column(BigInteger, nullable=False)
+
+
+class Blob(Base):
+    """A stored file's content, addressed by its SHA-256 (see blobstore.py)"""
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class BlobPath(Base):
+    """Public /uploads/... path that resolves to a blob"""
+    __tablename__ = "blob_paths"
+
+    path = Column(String(500), primary_key=True)
+    sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Attachment(Base):
+    """A file uploaded to an application or complaint (append-only)"""
+    __tablename__ = "attachments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_type = Column(String(20), nullable=False)  # application, complaint
+    owner_id = Column(Integer, nullable=False)
+    path = Column(String(500), nullable=False)
+    filename = Column(String(255), nullable=True)
+    size = Column(BigInteger, nullable=True)
+    mime_type = Column(String(100), nullable=True)
+    sha256 = Column(String(64), nullable=True)
+    thumbnail_path = Column(String(500), nullable=True)  # set by thumbnails.py for images
+    preview_path = Column(String(500), nullable=True)
+    uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_attachments_owner", "owner_type", "owner_id", "id"),
+    )
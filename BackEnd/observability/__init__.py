@@ -0,0 +1,5 @@
+"""Instrumentation shared by both APIs (``main.py`` and the ``app`` package).
+
+``metrics`` exports Prometheus metrics; ``querycount`` counts SQL statements
+per block and flags N+1 query shapes.
+"""
@@ -0,0 +1,221 @@
+"""Prometheus metrics for both APIs (``main.py`` and ``app/main.py``).
+
+The metrics are ``prometheus_client`` collectors in its default registry.
+``MetricsMiddleware`` is a plain ASGI middleware (no ``BaseHTTPMiddleware``
+task hop) that records in-flight requests, per-route latency and status
+codes, and how many SQL statements each request ran and how long they took.
+Routes are labelled by their template (``/api/applications/{id}``), and
+anything that did not match a route is ``unmatched``, so label cardinality
+stays bounded.
+
+SQL is counted through engine cursor events. The per-request tally lives in a
+context variable holding a mutable list, which is visible from sync handlers
+in the threadpool and from the async engine's greenlets alike.
+``instrument_engine`` also exports pool size, checked-out connections and
+overflow, and counts checkouts and newly opened connections through the
+pool's ``checkout`` and ``connect`` events.
+
+``/metrics`` serves everything in the Prometheus text format, but only to
+scrapers that are allowed to: with ``METRICS_TOKEN`` set, requests must send
+``Authorization: Bearer <token>``; otherwise only clients from
+``METRICS_ALLOWED_NETWORKS`` (comma-separated CIDRs, loopback by default)
+are answered.
+"""
+import contextvars
+import hmac
+import ipaddress
+import os
+import time
+from functools import wraps
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+METRICS_ALLOWED_NETWORKS = tuple(
+    ipaddress.ip_network(cidr.strip())
+    for cidr in os.environ.get("METRICS_ALLOWED_NETWORKS", "127.0.0.0/8,::1/128").split(",")
+    if cidr.strip()
+)
+
+
+def timed(histogram: Histogram, *labels):
+    """Decorator observing the wall time of every call, including ones that raise"""
+    series = histogram.labels(*labels) if labels else histogram
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                series.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# --- HTTP --------------------------------------------------------------------
+
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served")
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requests by route and status code", ("method", "route", "status")
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+
+# --- SQL ---------------------------------------------------------------------
+
+SQL_STATEMENTS = Counter("db_statements_total", "SQL statements executed", ("engine",))
+SQL_ERRORS = Counter("db_statement_errors_total", "SQL statements that raised", ("engine",))
+SQL_DURATION = Histogram(
+    "db_statement_duration_seconds", "Time per SQL statement", ("engine",),
+    buckets=LATENCY_BUCKETS,
+)
+SQL_PER_REQUEST = Histogram(
+    "db_statements_per_request", "SQL statements executed per request", ("route",),
+    buckets=COUNT_BUCKETS,
+)
+SQL_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Total SQL time per request", ("route",),
+    buckets=LATENCY_BUCKETS,
+)
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections handed out by the pool", ("engine",))
+POOL_CONNECTS = Counter("db_pool_connects_total", "New DBAPI connections opened by the pool", ("engine",))
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ("engine",))
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ("engine",))
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond pool_size", ("engine",))
+
+# --- Auth --------------------------------------------------------------------
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "bcrypt time per call", ("op",),
+    buckets=LATENCY_BUCKETS,
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge("password_hash_in_flight", "bcrypt jobs running on the hash pool")
+PASSWORD_HASH_QUEUED = Gauge("password_hash_queued", "bcrypt jobs waiting for a hash pool thread")
+PASSWORD_HASH_REJECTED = Counter("password_hash_rejected_total", "bcrypt jobs refused with 503")
+JWT_DURATION = Histogram(
+    "jwt_duration_seconds", "JWT encode/decode time per call", ("op",),
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01),
+)
+
+# [statement count, seconds] for the request being served, if any
+_request_sql = contextvars.ContextVar("request_sql", default=None)
+
+
+def instrument_engine(engine, name: str):
+    """Count statements and pool activity on a sync ``Engine`` (use ``AsyncEngine.sync_engine``)"""
+    statements = SQL_STATEMENTS.labels(name)
+    errors = SQL_ERRORS.labels(name)
+    duration = SQL_DURATION.labels(name)
+
+    # One statement runs on a connection at a time, so a single start time per
+    # connection suffices; a failed statement overwrites or pops it rather
+    # than leaving an entry behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        statements.inc()
+        duration.observe(elapsed)
+        tally = _request_sql.get()
+        if tally is not None:
+            tally[0] += 1
+            tally[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute never fires for a failed statement. On a
+        # disconnect the pool discards the connection, info and all.
+        conn = exception_context.connection
+        if conn is None or exception_context.is_disconnect:
+            if exception_context.cursor is not None:
+                errors.inc()
+        elif conn.info.pop("metrics_started", None) is not None:
+            errors.inc()
+
+    checkouts = POOL_CHECKOUTS.labels(name)
+    connects = POOL_CONNECTS.labels(name)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        connects.inc()
+
+    pool = engine.pool
+    for gauge, method in ((POOL_SIZE, "size"), (POOL_CHECKED_OUT, "checkedout"), (POOL_OVERFLOW, "overflow")):
+        if hasattr(pool, method):
+            gauge.labels(name).set_function(getattr(pool, method))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP and per-request SQL metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        tally = [0, 0.0]
+        token = _request_sql.set(tally)
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_sql.reset(token)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, status[0]).inc()
+            HTTP_DURATION.labels(method, route).observe(elapsed)
+            SQL_PER_REQUEST.labels(route).observe(tally[0])
+            SQL_TIME_PER_REQUEST.labels(route).observe(tally[1])
+
+
+def _scrape_allowed(request) -> bool:
+    if METRICS_TOKEN is not None:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(credentials, METRICS_TOKEN)
+    if request.client is None:
+        return False
+    try:
+        address = ipaddress.ip_address(request.client.host)
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_NETWORKS)
+
+
+def metrics_endpoint(request):
+    """Serve every registered metric in the Prometheus text format, to allowed scrapers only"""
+    if not _scrape_allowed(request):
+        return Response("Forbidden", status_code=403, media_type="text/plain")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,130 @@
+"""Query counting and N+1 detection.
+
+Every SQL statement sent by any engine in this process (both APIs, sync and
+async) passes through one ``before_cursor_execute`` listener. Inside
+``count_queries()`` the statements are collected on a ``QueryCounter``, which
+can report statement *shapes* that ran more than once: the same SQL with
+whitespace, bind markers and expanded ``IN`` lists normalized away. A shape
+repeating once per row of an earlier result is the N+1 signature.
+
+In tests (see ``tests/test_query_budgets.py``)::
+
+    with query_budget(2, allow_repeats=False):
+        await client.get("/api/v1/users/")
+
+``query_budget`` is a pytest fixture, enabled by ``pytest_plugins`` in the
+top-level ``conftest.py``. The client must call the app in the test's own
+context (``httpx.ASGITransport``), or the counter never sees the statements.
+Outside pytest, ``assert_max_queries(n)`` does the same.
+
+In development, ``NPlusOneMiddleware`` counts every request and prints the
+route and the repeated statements whenever a shape runs ``threshold`` times
+or more. Both ``main.py`` and ``app/main.py`` install it only when
+``QUERY_DEBUG=1`` is set.
+"""
+import contextvars
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import pytest
+except ImportError:  # pytest is only needed for the fixture
+    pytest = None
+
+NPLUSONE_THRESHOLD = 5
+
+_WHITESPACE = re.compile(r"\s+")
+# A run of bind markers inside parentheses: IN (%(p_1)s, %(p_2)s), IN ($1, $2), IN (?, ?)
+_BIND_LIST = re.compile(r"\(\s*(?:%\(\w+\)s|%s|\$\d+|\?)(?:\s*,\s*(?:%\(\w+\)s|%s|\$\d+|\?))*\s*\)")
+_BIND = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+
+_active = contextvars.ContextVar("querycount_active", default=())
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so one query run with different parameters compares equal"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _BIND_LIST.sub("(?...)", shape)
+    return _BIND.sub("?", shape)
+
+
+class QueryCounter:
+    """Statements executed while this counter was active"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = 2) -> dict:
+        """Statement shapes that ran at least ``threshold`` times, most frequent first"""
+        shapes = Counter(statement_shape(s) for s in self.statements)
+        return {shape: n for shape, n in shapes.most_common() if n >= threshold}
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements"]
+        for shape, n in self.repeated().items():
+            lines.append(f"  {n}x {shape}")
+        return "\n".join(lines)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active.get():
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Collect every statement executed in this context (threadpool and greenlets included)"""
+    counter = QueryCounter()
+    token = _active.set(_active.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, allow_repeats: bool = True):
+    """Fail if the block runs more than ``limit`` statements (or any repeated shape)"""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.report()}")
+    if not allow_repeats and counter.repeated():
+        raise AssertionError(f"Repeated statement shapes: {counter.report()}")
+
+
+if pytest is not None:
+    @pytest.fixture
+    def query_budget():
+        """``with query_budget(n): ...`` fails the test if the block runs more than n statements"""
+        return assert_max_queries
+
+
+class NPlusOneMiddleware:
+    """Dev-only ASGI middleware printing routes whose statements repeat ``threshold`` times"""
+
+    def __init__(self, app, threshold: int = NPLUSONE_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with count_queries() as counter:
+            await self.app(scope, receive, send)
+        offenders = counter.repeated(self.threshold)
+        if offenders:
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            print(f"N+1 suspect in {scope['method']} {route}: {counter.count} statements")
+            for shape, n in offenders.items():
+                print(f"  {n}x {shape}")
@@ -0,0 +1,54 @@
+"""Keyset (cursor) pagination over ``(created_at, id)``.
+
+Admin queues are ordered newest first. Instead of OFFSET, each page starts
+strictly after the last row of the previous one, so with the composite
+``(..., created_at, id)`` indexes every page costs the same as the first.
+The cursor handed to clients is an opaque url-safe token.
+"""
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, model, response: Response, cursor: str = None, limit: int = None):
+    """
+    Return one page of ``query`` ordered by ``created_at desc, id desc``.
+    When more rows remain, the cursor for the next page is set on the
+    ``X-Next-Cursor`` response header.
+
+    Clients that send neither ``cursor`` nor ``limit`` predate pagination
+    and still get every row; a ``cursor`` alone pages by DEFAULT_PAGE_SIZE.
+    """
+    if cursor is None and limit is None:
+        return query.order_by(model.created_at.desc(), model.id.desc()).all()
+    limit = limit or DEFAULT_PAGE_SIZE
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
@@ -0,0 +1,196 @@
+"""Resumable chunked uploads for large application documents.
+
+A client creates a session, PUTs chunks at increasing offsets (each with its
+SHA-256 in ``X-Chunk-SHA256``), can ask for the current offset after a dropped
+connection, and finally asks for the upload to be finalized, which hands the
+assembled file to the regular attachment path. Session state lives on disk
+under ``uploads/resumable/<id>/`` (``meta.json`` plus the partial ``data``
+file), so it survives restarts and is shared by every worker; the file length
+is the committed offset. Sessions untouched for ``SESSION_TTL_SECONDS`` are
+garbage-collected.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+import uploads
+
+RESUMABLE_DIR = os.path.join(uploads.UPLOAD_DIR, "resumable")
+RECOMMENDED_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+SESSION_TTL_SECONDS = 24 * 60 * 60
+GC_INTERVAL_SECONDS = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def _session_dir(upload_id: str) -> str:
+    if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return os.path.join(RESUMABLE_DIR, upload_id)
+
+
+def _status(upload_id: str, meta: dict, offset: int) -> dict:
+    return {
+        "upload_id": upload_id,
+        "offset": offset,
+        "size": meta["size"],
+        "chunk_size": RECOMMENDED_CHUNK_SIZE,
+        "expires_at": int(time.time()) + SESSION_TTL_SECONDS,
+    }
+
+
+def create(user_id: int, application_id: int, filename: str, size: int,
+           content_type: str = None, sha256: str = None) -> dict:
+    limit = uploads.MAX_UPLOAD_BYTES["documents"]
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="File size must be at least 1 byte")
+    if size > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {limit // (1024 * 1024)} MB"
+        )
+    upload_id = uuid.uuid4().hex
+    directory = _session_dir(upload_id)
+    os.makedirs(directory)
+    meta = {
+        "user_id": user_id,
+        "application_id": application_id,
+        "filename": filename,
+        "size": size,
+        "content_type": content_type,
+        "sha256": sha256.lower() if sha256 else None,
+        "created_at": int(time.time()),
+    }
+    tmp_meta = os.path.join(directory, "meta.json.tmp")
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, os.path.join(directory, "meta.json"))
+    open(os.path.join(directory, "data"), "wb").close()
+    return _status(upload_id, meta, 0)
+
+
+def load(upload_id: str, user_id: int):
+    """Return ``(meta, offset)`` for a session owned by ``user_id``"""
+    directory = _session_dir(upload_id)
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        offset = os.path.getsize(os.path.join(directory, "data"))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if meta["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return meta, offset
+
+
+def status(upload_id: str, user_id: int) -> dict:
+    meta, offset = load(upload_id, user_id)
+    return _status(upload_id, meta, offset)
+
+
+def _append(upload_id: str, meta: dict, offset: int, data: bytes) -> int:
+    if offset + len(data) > meta["size"]:
+        raise HTTPException(status_code=400, detail="Chunk extends past the declared file size")
+    path = os.path.join(_session_dir(upload_id), "data")
+    with open(path, "ab") as out:
+        fcntl.flock(out, fcntl.LOCK_EX)
+        current = os.fstat(out.fileno()).st_size
+        if offset + len(data) <= current:
+            # A retried chunk we already have
+            return current
+        if offset != current:
+            raise HTTPException(status_code=409, detail=f"Expected offset {current}")
+        out.write(data)
+        out.flush()
+        os.fsync(out.fileno())
+        return current + len(data)
+
+
+async def write_chunk(upload_id: str, user_id: int, offset: int, request: Request, checksum: str) -> dict:
+    meta, _ = await uploads.run_io(load, upload_id, user_id)
+
+    pieces = []
+    received = 0
+    async for piece in request.stream():
+        received += len(piece)
+        if received > MAX_CHUNK_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Chunk too large. Maximum is {MAX_CHUNK_BYTES // (1024 * 1024)} MB"
+            )
+        pieces.append(piece)
+    data = b"".join(pieces)
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty chunk")
+
+    digest = await uploads.run_io(lambda: hashlib.sha256(data).hexdigest())
+    if not checksum or checksum.lower() != digest:
+        raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+
+    offset = await uploads.run_io(_append, upload_id, meta, offset, data)
+    return _status(upload_id, meta, offset)
+
+
+def _assemble(upload_id: str, user_id: int):
+    meta, offset = load(upload_id, user_id)
+    if offset != meta["size"]:
+        raise HTTPException(status_code=409, detail=f"Upload incomplete: {offset} of {meta['size']} bytes")
+
+    directory = _session_dir(upload_id)
+    data_path = os.path.join(directory, "data")
+    digest = hashlib.sha256()
+    with open(data_path, "rb") as f:
+        for chunk in iter(lambda: f.read(uploads.CHUNK_SIZE), b""):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    if meta["sha256"] and meta["sha256"] != sha256:
+        raise HTTPException(status_code=400, detail="File checksum mismatch")
+
+    staged = os.path.join(uploads.STAGING_DIR, f".resumable-{upload_id}")
+    os.replace(data_path, staged)
+    shutil.rmtree(directory, ignore_errors=True)
+    return meta, uploads.ReceivedFile(staged, offset, sha256)
+
+
+async def assemble(upload_id: str, user_id: int):
+    """Verify a complete session and move its data into staging as a ReceivedFile"""
+    return await uploads.run_io(_assemble, upload_id, user_id)
+
+
+def gc(now: float = None) -> int:
+    """Delete sessions with no activity for SESSION_TTL_SECONDS; returns how many"""
+    now = now or time.time()
+    removed = 0
+    if not os.path.isdir(RESUMABLE_DIR):
+        return 0
+    for entry in os.scandir(RESUMABLE_DIR):
+        if not entry.is_dir():
+            continue
+        data_path = os.path.join(entry.path, "data")
+        try:
+            last_activity = os.path.getmtime(data_path)
+        except FileNotFoundError:
+            last_activity = entry.stat().st_mtime
+        if now - last_activity > SESSION_TTL_SECONDS:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+async def gc_periodically(interval: float = GC_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(gc)
+        except Exception:
+            logger.exception("Resumable upload cleanup failed")
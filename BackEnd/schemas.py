@@ -66,6 +66,35 @@ class ServiceResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AttachmentResponse(BaseModel):
+    id: int
+    path: str
+    filename: Optional[str] = None
+    size: Optional[int] = None
+    mime_type: Optional[str] = None
+    sha256: Optional[str] = None
+    thumbnail_path: Optional[str] = None
+    preview_path: Optional[str] = None
+    uploaded_by: Optional[int] = None
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int
+    content_type: Optional[str] = None
+    sha256: Optional[str] = None
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    offset: int
+    size: int
+    chunk_size: int
+    expires_at: int
+
+
 class ApplicationCreate(BaseModel):
     service_id: int
     applicant_name: str
@@ -83,7 +112,8 @@ class ApplicationStatusUpdate(BaseModel):
     admin_remarks: Optional[str] = None
 
 
-class ApplicationResponse(BaseModel):
+class ApplicationSummary(BaseModel):
+    """List item: everything but ``form_data``, which the list queries defer"""
     id: int
     serial_number: str
     user_id: int
@@ -94,8 +124,8 @@ class ApplicationResponse(BaseModel):
     municipality: Optional[str] = None
     ward_no: Optional[int] = None
     phone: Optional[str] = None
-    form_data: dict = {}
     documents: List[str] = []
+    attachments: List[AttachmentResponse] = []
     status: str
     remarks: Optional[str] = None
     admin_remarks: Optional[str] = None
@@ -105,6 +135,10 @@ class ApplicationResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ApplicationResponse(ApplicationSummary):
+    form_data: dict = {}
+
+
 class ApplicationWithService(ApplicationResponse):
     service: Optional[ServiceResponse] = None
 
@@ -131,13 +165,14 @@ class ComplaintUpdate(BaseModel):
     admin_response: Optional[str] = None
 
 
-class ComplaintResponse(BaseModel):
+class ComplaintSummary(BaseModel):
+    """List item: everything but ``description``, which the list queries defer"""
     id: int
     user_id: int
     office_type: str
     subject: str
-    description: str
     attachment_path: Optional[str] = None
+    attachments: List[AttachmentResponse] = []
     status: str
     admin_response: Optional[str] = None
     created_at: datetime
@@ -145,6 +180,10 @@ class ComplaintResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ComplaintResponse(ComplaintSummary):
+    description: str
+
+
 class NoticeCreate(BaseModel):
     title: str
     description: str
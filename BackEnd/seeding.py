@@ -0,0 +1,598 @@
+"""Seed data: the demo catalog behind ``/api/seed`` and a bulk generator.
+
+``seed_demo`` inserts the handful of services, notices and the admin account
+that ``POST /api/seed`` has always created. For capacity testing,
+``generate`` adds realistic volumes on top of it: users, applications
+spread over Nepali districts, municipalities and wards with age-dependent
+status mixes and per-service ``form_data``, complaints and notices.
+
+    DATABASE_URL=postgresql://.../janasewa_bench \\
+        python seeding.py --users 1000000 --applications 10000000 --complaints 1000000
+
+Rows are streamed to PostgreSQL with ``COPY`` in batches, with ids assigned
+here, so nothing round-trips per row. Ten million applications load in
+minutes. Output, down to the bench password hash, is deterministic for a
+given ``--seed``, ``--until`` and row counts. A rerun appends after the
+existing rows rather than duplicating them. Afterwards the id sequences and
+serial counters are moved past the new rows, the dashboard rollups are
+rebuilt and the tables are analyzed.
+Run it while the API is stopped: serial numbers are reserved at the end of
+the load, not per row.
+
+Generated users are ``bench-user-N@example.com`` with password
+``BENCH_PASSWORD``, the accounts ``loadtest.py run --no-seed`` logs in as.
+"""
+import argparse
+import bisect
+import csv
+import io
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import bcrypt
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import hashing
+import models
+import serials
+import stats
+
+DEMO_ADMIN = ("admin@janasewa.gov.np", "admin123")
+
+DEMO_SERVICES = [
+    {
+        "title": "Citizenship Certificate",
+        "description": "Apply for new citizenship certificate or renewal",
+        "required_documents": ["Birth Certificate", "Father/Mother's Citizenship", "Ward Recommendation", "2 Passport Photos"],
+        "office_type": "dao",
+        "fee": 100.0,
+        "estimated_days": 15
+    },
+    {
+        "title": "Driving License",
+        "description": "Apply for new driving license or renewal",
+        "required_documents": ["Citizenship Copy", "Medical Certificate", "Training Certificate", "2 Passport Photos"],
+        "office_type": "yatayat",
+        
+        "estimated_days": 30
+    },
+    {
+        "title": "Passport",
+        "description": "Apply for new passport or renewal",
+        "required_documents": ["Citizenship Copy", "Old Passport (if renewal)", "4 Passport Photos", "Online Form Print"],
+        "office_type": "passport",
+        "fee": 5000.0,
+        "estimated_days": 15
+    },
+    {
+        "title": "Tax Clearance",
+        "description": "Get tax clearance certificate",
+        "required_documents": ["PAN Certificate", "Previous Year Returns", "Bank Statement"],
+        "office_type": "tax",
+        "fee": 200.0,
+        "estimated_days": 7
+    },
+    {
+        "title": "Land Registration",
+        "description": "Register land ownership or transfer",
+        "required_documents": ["Land Ownership Certificate", "Citizenship Copy", "Tax Receipt", "Agreement Papers"],
+        "office_type": "ward",
+        "fee": 1000.0,
+        "estimated_days": 30
+    },
+    {
+        "title": "Birth Certificate",
+        "description": "Apply for birth registration certificate",
+        "required_documents": ["Hospital Birth Record", "Parent's Citizenship", "Ward Recommendation"],
+        "office_type": "ward",
+        "fee": 50.0,
+        "estimated_days": 3
+    },
+    {
+        "title": "Marriage Certificate",
+        "description": "Register marriage and get certificate",
+        "required_documents": ["Both Party's Citizenship", "Passport Photos", "Witnesses"],
+        "office_type": "ward",
+        "fee": 100.0,
+        "estimated_days": 7
+    },
+    {
+        "title": "Business Registration",
+        "description": "Register new business or company",
+        "required_documents": ["Citizenship Copy", "PAN Certificate", "Rent Agreement", "Photos"],
+        "office_type": "municipality",
+        "fee": 2000.0,
+        "estimated_days": 15
+    }
+]
+
+DEMO_NOTICES = [
+    {
+        "title": "National Scholarship Program 2082",
+        "description": "Applications open for meritorious students from marginalized communities. Apply before Baisakh 15.",
+        "category": "Scholarship"
+    },
+    {
+        "title": "Farmer Subsidy for Khet Land",
+        "description": "Government subsidy of up to Rs 50,000 for small-scale farmers for seeds and fertilizers.",
+        "category": "Agriculture"
+    },
+    {
+        "title": "New Online Passport System",
+        "description": "Department of Passports has launched a new online system effective from Magh 1.",
+        "category": "Announcement"
+    }
+]
+
+def seed_demo(db: Session):
+    """Insert the demo admin, services and notices; commits"""
+    email, password = DEMO_ADMIN
+    db.add(models.User(
+        full_name="Admin User",
+        email=email,
+        password=hashing.Hash.bcrypt(password),
+        role="admin"
+    ))
+    for s in DEMO_SERVICES:
+        db.add(models.Service(**s))
+    for n in DEMO_NOTICES:
+        db.add(models.Notice(**n))
+    db.commit()
+
+
+# --- Synthetic data ----------------------------------------------------------
+
+BENCH_PASSWORD = "Bench12345"
+DEFAULT_BATCH_SIZE = 50000
+
+
+def bench_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+_BCRYPT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def bench_password_hash(seed) -> str:
+    """bcrypt hash of ``BENCH_PASSWORD`` with a salt drawn from ``seed``, so reruns store the same hash"""
+    rng = random.Random(f"{seed}-password")
+    # 22 salt characters carry 128 bits; the last one only uses its top 2
+    salt = "".join(_pick(rng, _BCRYPT_ALPHABET) for _ in range(21)) + _pick(rng, _BCRYPT_ALPHABET[::16])
+    return bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), f"$2b$12${salt}".encode("ascii")).decode("utf-8")
+
+
+# district -> (relative population, [(municipality, wards)])
+DISTRICTS = {
+    "Kathmandu": (20.4, [("Kathmandu Metropolitan City", 32), ("Kirtipur", 10), ("Budhanilkantha", 13),
+                         ("Tokha", 11), ("Tarakeshwar", 11), ("Gokarneshwar", 9), ("Chandragiri", 15)]),
+    "Lalitpur": (5.5, [("Lalitpur Metropolitan City", 29), ("Godawari", 14), ("Mahalaxmi", 10)]),
+    "Bhaktapur": (4.3, [("Bhaktapur", 10), ("Madhyapur Thimi", 9), ("Suryabinayak", 10)]),
+    "Morang": (11.5, [("Biratnagar Metropolitan City", 19), ("Sundar Haraicha", 12), ("Belbari", 11),
+                      ("Urlabari", 9)]),
+    "Sunsari": (9.3, [("Itahari Sub-Metropolitan City", 20), ("Dharan Sub-Metropolitan City", 20),
+                      ("Inaruwa", 10)]),
+    "Jhapa": (9.9, [("Mechinagar", 15), ("Damak", 10), ("Birtamod", 10), ("Bhadrapur", 10)]),
+    "Parsa": (6.5, [("Birgunj Metropolitan City", 32), ("Pokhariya", 10)]),
+    "Chitwan": (7.2, [("Bharatpur Metropolitan City", 29), ("Ratnanagar", 16), ("Khairahani", 13)]),
+    "Kaski": (6.0, [("Pokhara Metropolitan City", 33), ("Annapurna", 11), ("Machhapuchchhre", 9)]),
+    "Rupandehi": (11.2, [("Butwal Sub-Metropolitan City", 19), ("Siddharthanagar", 13), ("Tilottama", 17),
+                         ("Devdaha", 12)]),
+    "Dhanusha": (8.6, [("Janakpurdham Sub-Metropolitan City", 25), ("Mithila", 11)]),
+    "Makwanpur": (4.7, [("Hetauda Sub-Metropolitan City", 19), ("Thaha", 12)]),
+    "Banke": (6.0, [("Nepalgunj Sub-Metropolitan City", 23), ("Kohalpur", 15)]),
+    "Dang": (6.7, [("Ghorahi Sub-Metropolitan City", 19), ("Tulsipur Sub-Metropolitan City", 19)]),
+    "Kailali": (9.1, [("Dhangadhi Sub-Metropolitan City", 19), ("Tikapur", 9), ("Lamki Chuha", 10)]),
+    "Kanchanpur": (5.2, [("Bhimdatta", 19), ("Punarbas", 11)]),
+    "Surkhet": (4.2, [("Birendranagar", 16), ("Gurbhakot", 14)]),
+    "Gorkha": (2.5, [("Gorkha", 14), ("Palungtar", 10)]),
+    "Syangja": (2.5, [("Putalibazar", 14), ("Waling", 14)]),
+    "Dadeldhura": (1.4, [("Amargadhi", 11), ("Parshuram", 12)]),
+}
+
+FIRST_NAMES = [
+    "Ram", "Sita", "Hari", "Gita", "Krishna", "Laxmi", "Bishnu", "Sarita", "Gopal", "Anita",
+    "Suman", "Sunita", "Rajesh", "Kamala", "Binod", "Radha", "Dipak", "Sabina", "Prakash", "Manisha",
+    "Ramesh", "Puja", "Santosh", "Asmita", "Nabin", "Srijana", "Bikash", "Rekha", "Sagar", "Nirmala",
+]
+SURNAMES = [
+    "Shrestha", "Thapa", "Sharma", "Adhikari", "Gurung", "Tamang", "Rai", "Limbu", "Magar", "Karki",
+    "Khadka", "Bhandari", "Koirala", "Poudel", "Yadav", "Chaudhary", "Maharjan", "Shah", "Basnet",
+    "Bhattarai", "Neupane", "Tharu", "Sherpa", "Ghimire", "Dahal", "Pandey", "Joshi", "Rana", "Mahato",
+    "Pokharel",
+]
+
+# (days since creation below which the weights apply, {status: weight}):
+# fresh applications are still open, old ones are almost all decided
+APPLICATION_STATUS_MIX = [
+    (7, {"Submitted": 70, "Under Review": 30}),
+    (30, {"Submitted": 20, "Under Review": 40, "Approved": 30, "Rejected": 10}),
+    (None, {"Submitted": 1, "Under Review": 4, "Approved": 80, "Rejected": 15}),
+]
+COMPLAINT_STATUS_MIX = [
+    (7, {"Pending": 80, "In Progress": 20}),
+    (60, {"Pending": 30, "In Progress": 40, "Resolved": 30}),
+    (None, {"Pending": 5, "In Progress": 10, "Resolved": 85}),
+]
+REJECTION_REASONS = [
+    "Ward recommendation missing.",
+    "Documents are not legible; please resubmit clear scans.",
+    "Name differs between citizenship and application.",
+    "Fee receipt not attached.",
+]
+
+COMPLAINT_SUBJECTS = {
+    "ward": ["Recommendation letter delayed", "Street light not working", "Drainage blocked near the ward office"],
+    "dao": ["Citizenship application pending for weeks", "Staff absent during office hours"],
+    "yatayat": ["Trial date postponed repeatedly", "Smart license card not printed"],
+    "passport": ["Passport not delivered after due date", "Online appointment system down"],
+    "tax": ["PAN registration delayed", "Incorrect tax assessment"],
+    "municipality": ["Garbage not collected", "Road repair left unfinished", "Building permit delayed"],
+}
+
+NOTICE_TEMPLATES = {
+    "Scholarship": ("Scholarship call for students of {district}",
+                    "Applications are open for students from {district}. Submit forms at the ward office."),
+    "Agriculture": ("Seed and fertilizer subsidy in {municipality}",
+                    "Registered farmers of {municipality} can apply for subsidized seeds and fertilizer."),
+    "Announcement": ("Service counters closed for maintenance in {district}",
+                     "Counters in {district} will be closed for one day for system maintenance."),
+    "Scheme": ("Housing support scheme for {district}",
+               "Low-income households in {district} may apply for housing support."),
+    "Health": ("Free health camp in {municipality}",
+               "A free health camp will be held in {municipality}. Bring your citizenship card."),
+    "Training": ("Skill training for youth in {district}",
+                 "Free vocational training for youth aged 16-40 in {district}."),
+}
+
+USER_COLUMNS = ("id", "full_name", "email", "password", "phone", "role", "created_at")
+APPLICATION_COLUMNS = (
+    "id", "serial_number", "user_id", "service_id", "applicant_name", "applicant_address", "district",
+    "municipality", "ward_no", "phone", "form_data", "documents", "status", "remarks", "admin_remarks",
+    "created_at", "updated_at",
+)
+COMPLAINT_COLUMNS = (
+    "id", "user_id", "office_type", "subject", "description", "status", "admin_response",
+    "created_at", "updated_at",
+)
+NOTICE_COLUMNS = ("id", "title", "description", "category", "deadline", "is_active", "created_at")
+
+
+class Places:
+    """Weighted draw of (district, municipality, wards), by population then ward count"""
+
+    def __init__(self):
+        self.places = []
+        self.cumulative = []
+        total = 0.0
+        for district, (population, municipalities) in DISTRICTS.items():
+            ward_total = sum(wards for _, wards in municipalities)
+            for municipality, wards in municipalities:
+                total += population * wards / ward_total
+                self.places.append((district, municipality, wards))
+                self.cumulative.append(total)
+        self.total = total
+
+    def pick(self, rng: random.Random):
+        return self.places[bisect.bisect(self.cumulative, rng.random() * self.total)]
+
+
+def _status_picker(mix):
+    """Turn a status mix into ``pick(rng, age_days) -> status``"""
+    bands = []
+    for max_age, weights in mix:
+        statuses = list(weights)
+        cumulative, total = [], 0
+        for status in statuses:
+            total += weights[status]
+            cumulative.append(total)
+        bands.append((max_age, statuses, cumulative, total))
+
+    def pick(rng, age_days):
+        for max_age, statuses, cumulative, total in bands:
+            if max_age is None or age_days < max_age:
+                return statuses[bisect.bisect(cumulative, rng.random() * total)]
+    return pick
+
+
+# Rows are generated tens of millions at a time; indexing by random() is
+# several times cheaper than Random.choice/randint and just as deterministic.
+
+def _pick(rng: random.Random, seq):
+    return seq[int(rng.random() * len(seq))]
+
+
+def _between(rng: random.Random, low: int, high: int) -> int:
+    return low + int(rng.random() * (high - low + 1))
+
+
+def _person(rng: random.Random) -> str:
+    return f"{_pick(rng, FIRST_NAMES)} {_pick(rng, SURNAMES)}"
+
+
+def _phone(rng: random.Random) -> str:
+    return f"98{int(rng.random() * 10 ** 8):08d}"
+
+
+def _bs_date(rng: random.Random, first_year: int, last_year: int) -> str:
+    return f"{_between(rng, first_year, last_year)}-{_between(rng, 1, 12):02d}-{_between(rng, 1, 30):02d}"
+
+
+def _form_data(rng: random.Random, title: str, district: str) -> dict:
+    """``form_data`` shaped like the frontend form for the service"""
+    title = title.lower()
+    if "citizenship" in title:
+        return {"father_name": _person(rng), "mother_name": _person(rng),
+                "birth_date": _bs_date(rng, 2040, 2064), "birth_place": district,
+                "type": _pick(rng, ["descent", "descent", "descent", "birth", "naturalized"])}
+    if "driving" in title:
+        return {"category": _pick(rng, ["A", "B", "K", "A,B"]), "blood_group": _pick(rng, ["A+", "B+", "O+", "AB+"]),
+                "trial_center": district}
+    if "passport" in title:
+        return {"passport_type": _pick(rng, ["ordinary", "ordinary", "ordinary", "official"]),
+                "pages": _pick(rng, [34, 66]), "renewal": rng.random() < 0.4}
+    if "tax" in title:
+        return {"pan": f"{int(rng.random() * 10 ** 9):09d}", "fiscal_year": _pick(rng, ["2079/80", "2080/81", "2081/82"])}
+    if "land" in title:
+        return {"kitta_no": _between(rng, 1, 9999), "area_ropani": round(rng.uniform(0.5, 20), 2),
+                "transfer_type": _pick(rng, ["sale", "inheritance", "gift"])}
+    if "birth" in title:
+        return {"child_name": _person(rng), "birth_date": _bs_date(rng, 2078, 2082),
+                "hospital": f"{district} Hospital", "gender": _pick(rng, ["male", "female"])}
+    if "marriage" in title:
+        return {"spouse_name": _person(rng), "marriage_date": _bs_date(rng, 2070, 2082)}
+    if "business" in title:
+        return {"business_name": f"{_pick(rng, SURNAMES)} Traders",
+                "business_type": _pick(rng, ["retail", "wholesale", "service", "manufacturing"]),
+                "capital": _pick(rng, [100000, 500000, 1000000, 5000000])}
+    return {"purpose": _pick(rng, ["new", "renewal", "correction"])}
+
+
+def _moments(rng: random.Random, count: int, start: datetime, span: timedelta):
+    """``count`` increasing timestamps spread over [start, start + span)"""
+    seconds = span.total_seconds()
+    for i in range(count):
+        yield i, start + timedelta(seconds=seconds * (i + rng.random()) / count)
+
+
+def _user_for(rng: random.Random, user_ids, i: int, count: int) -> int:
+    # Users are created over the same period, so row i only picks among
+    # users that existed by then
+    available = max(1, len(user_ids) * (i + 1) // count)
+    return user_ids[int(rng.random() * available)]
+
+
+def user_rows(rng: random.Random, first_id: int, first_index: int, count: int, password_hash: str,
+              start: datetime, span: timedelta):
+    for i, created in _moments(rng, count, start, span):
+        yield (first_id + i, _person(rng), bench_email(first_index + i), password_hash,
+               _phone(rng), "citizen", created)
+
+
+def application_rows(rng: random.Random, first_id: int, count: int, user_ids, services, serial_book,
+                     start: datetime, span: timedelta, until: datetime):
+    places = Places()
+    pick_status = _status_picker(APPLICATION_STATUS_MIX)
+    for i, created in _moments(rng, count, start, span):
+        service_id, title, estimated_days = _pick(rng, services)
+        district, municipality, wards = places.pick(rng)
+        ward = _between(rng, 1, wards)
+        age = (until - created).days
+        status = pick_status(rng, age)
+        updated, admin_remarks = created, None
+        if status != "Submitted":
+            updated = created + timedelta(days=rng.uniform(0, min(age, 2 * estimated_days)))
+        if status == "Approved":
+            admin_remarks = "Approved. Collect the document from the office."
+        elif status == "Rejected":
+            admin_remarks = _pick(rng, REJECTION_REASONS)
+        yield (
+            first_id + i, serial_book.next(created.year), _user_for(rng, user_ids, i, count), service_id,
+            _person(rng), f"{municipality}-{ward}, {district}", district, municipality, ward, _phone(rng),
+            json.dumps(_form_data(rng, title, district)), "[]", status,
+            "Urgent, please." if rng.random() < 0.05 else None, admin_remarks, created, updated,
+        )
+
+
+def complaint_rows(rng: random.Random, first_id: int, count: int, user_ids,
+                   start: datetime, span: timedelta, until: datetime):
+    offices = list(COMPLAINT_SUBJECTS)
+    pick_status = _status_picker(COMPLAINT_STATUS_MIX)
+    for i, created in _moments(rng, count, start, span):
+        office = _pick(rng, offices)
+        subject = _pick(rng, COMPLAINT_SUBJECTS[office])
+        age = (until - created).days
+        status = pick_status(rng, age)
+        updated = created if status == "Pending" else created + timedelta(days=rng.uniform(0, min(age, 30)))
+        yield (
+            first_id + i, _user_for(rng, user_ids, i, count), office, subject,
+            f"{subject}. Visited the office {_between(rng, 1, 5)} times without a resolution.",
+            status, "Resolved; thank you for reporting." if status == "Resolved" else None, created, updated,
+        )
+
+
+def notice_rows(rng: random.Random, first_id: int, count: int, start: datetime, span: timedelta,
+                until: datetime):
+    places = Places()
+    categories = list(NOTICE_TEMPLATES)
+    for i, created in _moments(rng, count, start, span):
+        category = _pick(rng, categories)
+        district, municipality, _ = places.pick(rng)
+        title, description = NOTICE_TEMPLATES[category]
+        deadline = (created + timedelta(days=_between(rng, 15, 60))).date()
+        yield (first_id + i, title.format(district=district, municipality=municipality),
+               description.format(district=district, municipality=municipality),
+               category, deadline, deadline >= until.date(), created)
+
+
+class SerialBook:
+    """Per-year serial numbers for generated rows, continuing after existing ones"""
+
+    def __init__(self, conn, years):
+        self.next_numbers = {}
+        for year in years:
+            stored = conn.execute(
+                select(models.SerialCounter.next_value).where(models.SerialCounter.year == year)
+            ).scalar()
+            self.next_numbers[year] = max(stored or 0, serials.SerialAllocator._highest_issued(conn, year) + 1)
+
+    def next(self, year: int) -> str:
+        number = self.next_numbers[year]
+        self.next_numbers[year] = number + 1
+        return serials.format_serial(year, number)
+
+    def save(self, conn):
+        """Move the counters past every generated serial"""
+        counter = models.SerialCounter
+        for year, next_value in self.next_numbers.items():
+            stmt = insert(counter).values(year=year, next_value=next_value)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[counter.year],
+                set_={"next_value": func.greatest(counter.next_value, stmt.excluded.next_value)},
+            ))
+
+
+def copy_rows(engine, table: str, columns, rows, batch_size: int) -> int:
+    """
+    Stream ``rows`` into ``table`` with COPY, committing every ``batch_size``
+    rows. Each batch is sent from a second thread while the next one is
+    generated, so the server's COPY time overlaps Python's generation time.
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    raw = engine.raw_connection()
+    loaded = 0
+    started = time.perf_counter()
+    try:
+        cursor = raw.cursor()
+        with ThreadPoolExecutor(max_workers=1) as copier:
+            pending = None
+            for batch in _batches(rows, batch_size):
+                if pending is not None:
+                    loaded += pending.result()
+                    rate = loaded / (time.perf_counter() - started)
+                    print(f"  {table}: {loaded:,} rows ({rate:,.0f}/s)", end="\r", flush=True)
+                pending = copier.submit(_copy_batch, raw, cursor, sql, batch)
+            if pending is not None:
+                loaded += pending.result()
+    finally:
+        raw.close()
+    elapsed = time.perf_counter() - started
+    print(f"  {table}: {loaded:,} rows in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):,.0f}/s)")
+    return loaded
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_batch(raw, cursor, sql: str, batch) -> int:
+    # NULL is an unquoted empty field in CSV COPY; generated rows hold no empty strings
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    buffer.seek(0)
+    cursor.copy_expert(sql, buffer)
+    raw.commit()
+    return len(batch)
+
+
+def _next_id(conn, table: str) -> int:
+    return conn.execute(text(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")).scalar()
+
+
+def generate(engine, users: int, applications: int, complaints: int, notices: int, seed: int = 1,
+             until: date = None, days: int = 730, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Bulk-load synthetic rows (see the module docstring); returns row counts per table"""
+    until = datetime.combine(until or date.today(), datetime.min.time())
+    span = timedelta(days=days)
+    start = until - span
+
+    with Session(engine) as db:
+        if db.query(models.Service.id).first() is None:
+            seed_demo(db)
+        services = db.execute(
+            select(models.Service.id, models.Service.title, models.Service.estimated_days)
+            .order_by(models.Service.id)
+        ).all()
+        first_index = db.query(func.count(models.User.id)).filter(
+            models.User.email.like("bench-user-%")
+        ).scalar()
+
+    with engine.connect() as conn:
+        first_ids = {table: _next_id(conn, table) for table in ("users", "applications", "complaints", "notices")}
+        serial_book = SerialBook(conn, range(start.year, until.year + 1))
+
+    loaded = {}
+    if users:
+        password_hash = bench_password_hash(seed)  # shared: one bcrypt call, not millions
+        rows = user_rows(random.Random(f"{seed}-users"), first_ids["users"], first_index, users,
+                         password_hash, start, span)
+        loaded["users"] = copy_rows(engine, "users", USER_COLUMNS, rows, batch_size)
+
+    if users:
+        user_ids = range(first_ids["users"], first_ids["users"] + users)
+    elif applications or complaints:
+        with engine.connect() as conn:
+            user_ids = conn.execute(
+                select(models.User.id).where(models.User.role == "citizen").order_by(models.User.id)
+            ).scalars().all()
+        if not user_ids:
+            raise SystemExit("No citizen users to own applications and complaints; pass --users")
+
+    if applications:
+        rows = application_rows(random.Random(f"{seed}-applications"), first_ids["applications"], applications,
+                                user_ids, services, serial_book, start, span, until)
+        loaded["applications"] = copy_rows(engine, "applications", APPLICATION_COLUMNS, rows, batch_size)
+    if complaints:
+        rows = complaint_rows(random.Random(f"{seed}-complaints"), first_ids["complaints"], complaints,
+                              user_ids, start, span, until)
+        loaded["complaints"] = copy_rows(engine, "complaints", COMPLAINT_COLUMNS, rows, batch_size)
+    if notices:
+        rows = notice_rows(random.Random(f"{seed}-notices"), first_ids["notices"], notices, start, span, until)
+        loaded["notices"] = copy_rows(engine, "notices", NOTICE_COLUMNS, rows, batch_size)
+
+    # Ids were assigned here, so the sequences still point at the old end
+    with engine.begin() as conn:
+        for table in loaded:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            ))
+        serial_book.save(conn)
+    with Session(engine) as db:
+        stats.rebuild(db)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in loaded:
+            conn.execute(text(f"ANALYZE {table}"))
+    return loaded
+
+
+if __name__ == "__main__":
+    from Config import engine
+
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic users, applications, complaints and notices")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--applications", type=int, default=1000000)
+    parser.add_argument("--complaints", type=int, default=100000)
+    parser.add_argument("--notices", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1, help="same seed, same rows")
+    parser.add_argument("--until", type=date.fromisoformat, default=None,
+                        help="newest creation date, YYYY-MM-DD (default today)")
+    parser.add_argument("--days", type=int, default=730, help="history covered by the rows")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per COPY")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    loaded = generate(engine, args.users, args.applications, args.complaints, args.notices,
+                      seed=args.seed, until=args.until, days=args.days, batch_size=args.batch_size)
+    print(f"Loaded {sum(loaded.values()):,} rows in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,193 @@
+"""Negative-lookup filter for tracking serials.
+
+Bots enumerate ``/api/track/JS-YEAR-NNNN``; without a filter every guess is a
+unique-index probe. ``SerialFilter`` keeps a Bloom filter of every issued serial
+so definite misses are answered from memory.
+
+The filter is built at startup, fed by ``create_application`` in this worker,
+and kept current with serials created by other workers through a catch-up
+query. That query is the only database work a miss can cause, and it runs at
+most once per ``CATCH_UP_INTERVAL`` across all misses, so enumeration costs
+at most one query per second however many guesses arrive. A full rebuild
+runs every ``REBUILD_INTERVAL`` to resize the filter as the table grows.
+
+Ids are handed out at insert but rows become visible at commit, so a row can
+commit below the id cursor. Besides ``id > last_seen``, each catch-up
+therefore re-reads rows created within ``CATCH_UP_OVERLAP`` of the previous
+one; a serial whose transaction stayed open longer than that is picked up by
+the next rebuild. Malformed serials never reach the database, and misses skip
+loading and serializing the tracking row.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+import models
+
+SERIAL_PATTERN = re.compile(r"^JS-\d{4}-\d{4,}$")
+
+FALSE_POSITIVE_RATE = 0.001
+MIN_CAPACITY = 100_000
+CATCH_UP_INTERVAL = 1.0
+REBUILD_INTERVAL = 15 * 60
+# Ids are not committed in order, so each catch-up re-reads recently created rows
+CATCH_UP_OVERLAP = timedelta(seconds=60)
+BUILD_BATCH_SIZE = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for ``capacity`` items at ``fp_rate``"""
+
+    def __init__(self, capacity: int, fp_rate: float = FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    @property
+    def estimated_fp_rate(self) -> float:
+        """False-positive rate for the number of items added so far"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class SerialFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._last_catch_up = 0.0
+        # created_at (naive UTC, like the column) as of the last build or catch-up
+        self._caught_up_at = datetime.utcnow()
+        self.built_at = None
+        self.rejected = 0
+        self.passed = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def rebuild(self, db: Session):
+        """Rebuild from every serial in the database, sized for twice the current count"""
+        started = datetime.utcnow()
+        count, last_id = db.query(
+            func.count(models.Application.id), func.max(models.Application.id)
+        ).one()
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * count))
+        for (serial_number,) in db.query(models.Application.serial_number).yield_per(BUILD_BATCH_SIZE):
+            bloom.add(serial_number)
+        with self._lock:
+            self._bloom = bloom
+            self._last_id = last_id or 0
+            self._caught_up_at = started
+            self.built_at = time.time()
+        self.catch_up(db)
+
+    def catch_up(self, db: Session):
+        """Add serials created (by any worker) since the last build or catch-up"""
+        started = datetime.utcnow()
+        with self._lock:
+            bloom, last_id = self._bloom, self._last_id
+            created_since = self._caught_up_at - CATCH_UP_OVERLAP
+            self._last_catch_up = time.monotonic()
+        if bloom is None:
+            return
+        rows = db.query(models.Application.id, models.Application.serial_number).filter(or_(
+            models.Application.id > last_id,
+            models.Application.created_at >= created_since,
+        )).all()
+        with self._lock:
+            for row_id, serial_number in rows:
+                if serial_number not in bloom:
+                    bloom.add(serial_number)
+                self._last_id = max(self._last_id, row_id)
+            self._caught_up_at = max(self._caught_up_at, started)
+
+    def add(self, serial_number: str):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(serial_number)
+
+    def might_exist(self, db: Session, serial_number: str) -> bool:
+        """False only when ``serial_number`` is certainly not an issued serial"""
+        if not SERIAL_PATTERN.match(serial_number):
+            self.rejected += 1
+            return False
+        bloom = self._bloom
+        if bloom is None or serial_number in bloom:
+            self.passed += 1
+            return True
+        if time.monotonic() - self._last_catch_up >= CATCH_UP_INTERVAL:
+            self.catch_up(db)
+            if serial_number in self._bloom:
+                self.passed += 1
+                return True
+        self.rejected += 1
+        return False
+
+    def metrics(self) -> dict:
+        bloom = self._bloom
+        return {
+            "ready": bloom is not None,
+            "items": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else 0,
+            "memory_bytes": bloom.memory_bytes if bloom else 0,
+            "hash_count": bloom.hash_count if bloom else 0,
+            "estimated_false_positive_rate": bloom.estimated_fp_rate if bloom else 0.0,
+            "built_at": self.built_at,
+            "rejected_lookups": self.rejected,
+            "passed_lookups": self.passed,
+        }
+
+
+_filter = SerialFilter()
+
+add = _filter.add
+might_exist = _filter.might_exist
+metrics = _filter.metrics
+
+
+def rebuild_with(session_factory):
+    db = session_factory()
+    try:
+        _filter.rebuild(db)
+    finally:
+        db.close()
+
+
+async def rebuild_periodically(session_factory, interval: float = REBUILD_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(rebuild_with, session_factory)
+        except Exception:
+            logger.exception("Serial filter rebuild failed")
@@ -0,0 +1,76 @@
+"""Collision-free serial numbers (``JS-YEAR-NNNN``) backed by a per-year counter.
+
+Each worker process reserves a block of numbers from ``serial_counters`` in its
+own short transaction and then hands them out from memory, so the common case
+needs no database round-trip at all. Numbers left in a block when a process
+exits are simply skipped: serials are unique, not gap-free, and only ordered
+within one worker.
+The numeric part is zero-padded to four digits and widens past 9999.
+"""
+import threading
+from datetime import datetime
+
+from sqlalchemy import BigInteger, cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+import models
+
+DEFAULT_BLOCK_SIZE = 50
+
+
+def format_serial(year: int, number: int) -> str:
+    return f"JS-{year}-{number:04d}"
+
+
+class SerialAllocator:
+    """Hands out serials from an in-memory block, refilling it from the database"""
+
+    def __init__(self, engine, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.engine = engine
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._year = None
+        self._next = 0
+        self._end = 0
+
+    def next_serial(self) -> str:
+        year = datetime.now().year
+        with self._lock:
+            if self._year != year or self._next >= self._end:
+                self._next, self._end = self._reserve_block(year)
+                self._year = year
+            number = self._next
+            self._next += 1
+        return format_serial(year, number)
+
+    def _reserve_block(self, year: int):
+        """Atomically advance the year's counter by one block and return [start, end)"""
+        counter = models.SerialCounter
+        with self.engine.begin() as conn:
+            end = conn.execute(
+                update(counter)
+                .where(counter.year == year)
+                .values(next_value=counter.next_value + self.block_size)
+                .returning(counter.next_value)
+            ).scalar()
+            if end is None:
+                # First block of the year: start above any serial already issued
+                # (older random serials included) so the counter never collides.
+                start = self._highest_issued(conn, year) + 1
+                stmt = insert(counter).values(year=year, next_value=start + self.block_size)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[counter.year],
+                    set_={"next_value": counter.next_value + self.block_size},
+                )
+                end = conn.execute(stmt.returning(counter.next_value)).scalar()
+        return end - self.block_size, end
+
+    @staticmethod
+    def _highest_issued(conn, year: int) -> int:
+        prefix = f"JS-{year}-"
+        suffix = func.substr(models.Application.serial_number, len(prefix) + 1)
+        highest = conn.execute(
+            select(func.max(cast(suffix, BigInteger)))
+            .where(models.Application.serial_number.like(prefix + "%"))
+        ).scalar()
+        return highest or 0
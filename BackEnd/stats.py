@@ -0,0 +1,192 @@
+"""Incrementally maintained counters behind the admin dashboard.
+
+Every write path that changes a counted row calls one of the ``record_*``
+helpers before committing, so ``stats_rollup`` moves in the same transaction as
+the rows it describes and the dashboard becomes a single small read.
+
+``rebuild`` recomputes every counter from the base tables and reports drift:
+
+    python stats.py --check     # report drift, change nothing
+    python stats.py --rebuild   # recompute and overwrite the rollups
+"""
+import argparse
+from datetime import datetime, date
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+
+USERS = "users"
+SERVICES = "services"
+NOTICES = "notices"
+
+PENDING_APPLICATION_STATUSES = ["Submitted", "Under Review"]
+PENDING_COMPLAINT_STATUSES = ["Pending"]
+
+
+def application_key(status: str) -> str:
+    return f"applications:{status}"
+
+
+def complaint_key(status: str) -> str:
+    return f"complaints:{status}"
+
+
+def approved_on_key(day: date) -> str:
+    return f"approved_on:{day.isoformat()}"
+
+
+def bump(db: Session, key: str, delta: int = 1):
+    """Atomically add ``delta`` to a counter, creating it on first use"""
+    if not delta:
+        return
+    now = datetime.utcnow()
+    stmt = insert(models.StatsRollup).values(key=key, value=delta, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.StatsRollup.key],
+        set_={
+            "value": models.StatsRollup.value + stmt.excluded.value,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(stmt)
+
+
+def record_application_created(db: Session, status: str):
+    bump(db, application_key(status))
+
+
+def record_application_update(db: Session, old_status: str, old_updated_at, new_status: str):
+    """
+    Move an application between status buckets and keep the per-day approval
+    bucket aligned with ``updated_at``, which is what "approved today" counts.
+    The new ``updated_at`` is assumed to be now (set explicitly or by onupdate).
+    The old values must be read under a row lock (``with_for_update()``), or
+    two concurrent updates both move the row out of the same bucket.
+    """
+    if old_status != new_status:
+        bump(db, application_key(old_status), -1)
+        bump(db, application_key(new_status), 1)
+    if old_status == "Approved" and old_updated_at is not None:
+        bump(db, approved_on_key(old_updated_at.date()), -1)
+    if new_status == "Approved":
+        bump(db, approved_on_key(datetime.utcnow().date()), 1)
+
+
+def record_complaint_created(db: Session, status: str):
+    bump(db, complaint_key(status))
+
+
+def record_complaint_update(db: Session, old_status: str, new_status: str):
+    """Move a complaint between status buckets; read ``old_status`` under a row lock"""
+    if old_status != new_status:
+        bump(db, complaint_key(old_status), -1)
+        bump(db, complaint_key(new_status), 1)
+
+
+def compute_counts(db: Session) -> dict:
+    """Recompute every rollup from the base tables (one grouped query per table)"""
+    counts = {
+        USERS: db.query(func.count(models.User.id)).scalar(),
+        SERVICES: db.query(func.count(models.Service.id)).scalar(),
+        NOTICES: db.query(func.count(models.Notice.id)).scalar(),
+    }
+    for status, count in db.query(
+        models.Application.status, func.count(models.Application.id)
+    ).group_by(models.Application.status):
+        counts[application_key(status)] = count
+    for status, count in db.query(
+        models.Complaint.status, func.count(models.Complaint.id)
+    ).group_by(models.Complaint.status):
+        counts[complaint_key(status)] = count
+
+    today = datetime.utcnow().date()
+    counts[approved_on_key(today)] = db.query(func.count(models.Application.id)).filter(
+        models.Application.status == "Approved",
+        models.Application.updated_at >= datetime.combine(today, datetime.min.time())
+    ).scalar()
+    return counts
+
+
+def rebuild(db: Session, write: bool = True) -> dict:
+    """
+    Recompute the rollups and return ``{key: (stored, actual)}`` for every
+    counter that drifted. With ``write`` the table is replaced by the fresh
+    values; the table lock makes concurrent ``bump`` calls wait until we commit
+    so no increment is lost in between.
+    """
+    if write:
+        db.execute(text("LOCK TABLE stats_rollup IN EXCLUSIVE MODE"))
+    stored = {row.key: row.value for row in db.query(models.StatsRollup)}
+    actual = compute_counts(db)
+
+    drift = {}
+    for key in set(stored) | set(actual):
+        # Past approval buckets are never read, so they are pruned rather than reported
+        if key.startswith("approved_on:") and key not in actual:
+            continue
+        if stored.get(key, 0) != actual.get(key, 0):
+            drift[key] = (stored.get(key, 0), actual.get(key, 0))
+
+    if write:
+        db.query(models.StatsRollup).delete(synchronize_session=False)
+        now = datetime.utcnow()
+        db.add_all(
+            models.StatsRollup(key=key, value=value, updated_at=now)
+            for key, value in actual.items()
+        )
+        db.commit()
+    else:
+        db.rollback()
+    return drift
+
+
+def read_stats(db: Session) -> dict:
+    """Dashboard counters from the rollup table (rebuilt on first use)"""
+    stored = {row.key: row.value for row in db.query(models.StatsRollup)}
+    if not stored:
+        rebuild(db)
+        stored = {row.key: row.value for row in db.query(models.StatsRollup)}
+
+    def total(prefix):
+        return sum(v for k, v in stored.items() if k.startswith(prefix))
+
+    return {
+        "total_users": stored.get(USERS, 0),
+        "total_services": stored.get(SERVICES, 0),
+        "total_applications": total("applications:"),
+        "pending_applications": sum(stored.get(application_key(s), 0) for s in PENDING_APPLICATION_STATUSES),
+        "approved_applications": stored.get(application_key("Approved"), 0),
+        "rejected_applications": stored.get(application_key("Rejected"), 0),
+        "total_complaints": total("complaints:"),
+        "pending_complaints": sum(stored.get(complaint_key(s), 0) for s in PENDING_COMPLAINT_STATUSES),
+        "total_notices": stored.get(NOTICES, 0),
+        "approved_today": stored.get(approved_on_key(datetime.utcnow().date()), 0),
+    }
+
+
+if __name__ == "__main__":
+    from Config import engine, session
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the admin dashboard rollups")
+    parser.add_argument("--rebuild", action="store_true", help="overwrite the rollups with fresh counts")
+    parser.add_argument("--check", action="store_true", help="only report drift (default)")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = session()
+    try:
+        drift = rebuild(db, write=args.rebuild)
+    finally:
+        db.close()
+
+    if not drift:
+        print("stats_rollup is in sync")
+    for key, (stored, actual) in sorted(drift.items()):
+        print(f"{key}: stored={stored} actual={actual}")
+    if args.rebuild:
+        print("stats_rollup rebuilt")
+    elif drift:
+        raise SystemExit(1)
@@ -0,0 +1,99 @@
+"""Query budgets for endpoints whose relationships are easy to load per row.
+
+Each test creates enough rows that a per-row lazy load would blow the budget,
+then runs the request inside ``query_budget`` with repeated statement shapes
+disallowed.
+"""
+import asyncio
+import uuid
+
+
+def test_list_users_loads_roles_in_one_query(app_main, serve, query_budget):
+    """GET /api/v1/users/: one SELECT for the users, one SELECT ... IN for all their roles"""
+    from app import models
+    from app.auth import create_access_token
+    from app.database import SessionLocal
+
+    tag = uuid.uuid4().hex[:8]
+
+    def create_users():
+        db = SessionLocal()
+        try:
+            roles = {role.name: role for role in db.query(models.Role).all()}
+            admin = models.User(
+                name="Budget Admin", email=f"admin-{tag}@example.com", password="x",
+                roles=[roles[models.RoleNames.SUPERADMIN]],
+            )
+            db.add(admin)
+            for i in range(10):
+                db.add(models.User(
+                    name=f"Budget User {i}", email=f"user-{i}-{tag}@example.com", password="x",
+                    roles=[roles[models.RoleNames.USER], roles[models.RoleNames.MODERATOR]],
+                ))
+            db.commit()
+            return admin.id
+        finally:
+            db.close()
+
+    async def scenario():
+        # The lifespan creates the tables and the default roles
+        async with serve(app_main.app) as client:
+            admin_id = create_users()
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': str(admin_id)})}"}
+            params = {"search": tag}
+            # Warm the permission table and the principal cache
+            warmup = await client.get("/api/v1/users/", params=params, headers=headers)
+            assert warmup.status_code == 200
+
+            with query_budget(2, allow_repeats=False):
+                return await client.get("/api/v1/users/", params=params, headers=headers)
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    users = response.json()
+    assert len(users) == 11
+    assert all(user["roles"] for user in users)
+
+
+def test_application_with_service_loads_in_three_queries(legacy_main, serve, query_budget):
+    """GET /api/applications/{id}: the user, the application joined to its service, its attachments"""
+    import attachments
+    import auth_token
+    import models
+    from Config import session
+
+    tag = uuid.uuid4().hex[:8]
+    db = session()
+    try:
+        user = models.User(full_name="Budget Citizen", email=f"citizen-{tag}@example.com", password="x")
+        service = models.Service(title=f"Budget Service {tag}", office_type="Ward Office")
+        db.add_all([user, service])
+        db.flush()
+        application = models.Application(
+            serial_number=f"BUDGET-{tag}", user_id=user.id, service_id=service.id,
+            applicant_name="Budget Citizen",
+        )
+        db.add(application)
+        db.flush()
+        for i in range(5):
+            db.add(models.Attachment(
+                owner_type=attachments.APPLICATION, owner_id=application.id,
+                path=f"uploads/budget-{tag}-{i}.pdf", uploaded_by=user.id,
+            ))
+        db.commit()
+        user_id, application_id = user.id, application.id
+    finally:
+        db.close()
+
+    headers = {"Authorization": f"Bearer {auth_token.create_access_token({'sub': str(user_id)})}"}
+
+    async def scenario():
+        async with serve(legacy_main.app) as client:
+            with query_budget(3, allow_repeats=False):
+                return await client.get(f"/api/applications/{application_id}", headers=headers)
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    body = response.json()
+    assert body["service"]["title"] == f"Budget Service {tag}"
+    assert len(body["attachments"]) == 5
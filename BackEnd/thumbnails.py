@@ -0,0 +1,209 @@
+"""Background thumbnails and previews for uploaded images.
+
+Upload handlers call ``schedule`` after committing; image attachments are
+rendered on a process pool (so JPEG decoding never competes with the API for
+the GIL) into a small thumbnail and a re-encoded preview. Both are stored in
+the blob store under ``/uploads/thumbnails/`` and ``/uploads/previews/`` and
+recorded on the attachment, so list views can fetch kilobytes instead of the
+multi-megabyte original, which is never modified.
+
+The pool size and the number of queued jobs are set with
+``THUMBNAIL_WORKERS`` and ``THUMBNAIL_QUEUE_DEPTH``. When the queue is full,
+or Pillow is not installed, images are simply left without derivatives;
+``python thumbnails.py --backfill`` renders whatever is missing.
+"""
+import argparse
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from sqlalchemy.orm import Session
+
+import blobstore
+import models
+import uploads
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional
+    Image = None
+
+THUMBNAIL_WORKERS = int(os.environ.get("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_QUEUE_DEPTH = int(os.environ.get("THUMBNAIL_QUEUE_DEPTH", "100"))
+THUMBNAIL_SIZE = 256
+PREVIEW_SIZE = 1280
+JPEG_QUALITY = 80
+MAX_SOURCE_PIXELS = 60_000_000
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = (
+    ("thumbnails", THUMBNAIL_SIZE),
+    ("previews", PREVIEW_SIZE),
+)
+
+_lock = threading.Lock()
+_pending = 0
+_pool = None
+# Recording results touches the DB and renames files; keep it off the pool's
+# result-handling thread
+_recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnail-record")
+
+
+def is_image(mime_type: str) -> bool:
+    return bool(mime_type) and mime_type.startswith("image/")
+
+
+def render(source: str, staging_dir: str):
+    """
+    Decode ``source`` once and write one JPEG per variant into ``staging_dir``.
+    Runs in a worker process; returns ``[(category, ReceivedFile), ...]``.
+    """
+    Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+    results = []
+    with Image.open(source) as img:
+        # Let the JPEG decoder downscale while decoding
+        img.draft("RGB", (PREVIEW_SIZE, PREVIEW_SIZE))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        for category, size in sorted(VARIANTS, key=lambda v: -v[1]):
+            img.thumbnail((size, size))
+            fd, tmp_path = tempfile.mkstemp(dir=staging_dir, prefix=".thumbnail-")
+            with os.fdopen(fd, "wb") as out:
+                img.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                out.flush()
+                os.fsync(out.fileno())
+            with open(tmp_path, "rb") as f:
+                data = f.read()
+            results.append((category, uploads.ReceivedFile(tmp_path, len(data), hashlib.sha256(data).hexdigest())))
+    return results
+
+
+def record(db: Session, attachment_id: int, results) -> bool:
+    """Store rendered variants and point the attachment at them; commits"""
+    attachment = db.get(models.Attachment, attachment_id)
+    if attachment is None:
+        for _, received in results:
+            uploads.discard(received.tmp_path)
+        return False
+    paths = {}
+    for category, received in results:
+        paths[category] = blobstore.register(db, received, category, f"{attachment.sha256}.jpg")
+    attachment.thumbnail_path = paths.get("thumbnails")
+    attachment.preview_path = paths.get("previews")
+    db.commit()
+    return True
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: workers must not inherit the server's sockets and DB connections
+        _pool = ProcessPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def _save(session_factory, attachment_id: int, future):
+    try:
+        results = future.result()
+    except Exception:
+        logger.exception("Thumbnail rendering failed for attachment %s", attachment_id)
+        return
+    db = session_factory()
+    try:
+        record(db, attachment_id, results)
+    except Exception:
+        db.rollback()
+        for _, received in results:
+            uploads.discard(received.tmp_path)
+        logger.exception("Recording thumbnails failed for attachment %s", attachment_id)
+    finally:
+        db.close()
+
+
+def _done(session_factory, attachment_id: int, future):
+    global _pending
+    with _lock:
+        _pending -= 1
+    _recorder.submit(_save, session_factory, attachment_id, future)
+
+
+def schedule(session_factory, rows) -> int:
+    """Queue image attachments for rendering; returns how many were accepted"""
+    global _pending
+    if Image is None:
+        return 0
+    accepted = 0
+    for row in rows:
+        if not is_image(row.mime_type) or not row.sha256:
+            continue
+        with _lock:
+            if _pending >= THUMBNAIL_QUEUE_DEPTH:
+                continue
+            _pending += 1
+        future = _executor().submit(render, blobstore.blob_path(row.sha256), uploads.STAGING_DIR)
+        future.add_done_callback(partial(_done, session_factory, row.id))
+        accepted += 1
+    return accepted
+
+
+def metrics() -> dict:
+    return {
+        "enabled": Image is not None,
+        "workers": THUMBNAIL_WORKERS,
+        "queue_depth": THUMBNAIL_QUEUE_DEPTH,
+        "pending": _pending,
+    }
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def backfill(db: Session) -> int:
+    """Render variants for image attachments that have none, in this process"""
+    if Image is None:
+        raise SystemExit("Pillow is not installed")
+    rendered = 0
+    missing = db.query(models.Attachment.id, models.Attachment.sha256).filter(
+        models.Attachment.mime_type.like("image/%"),
+        models.Attachment.sha256.isnot(None),
+        models.Attachment.thumbnail_path.is_(None)
+    ).order_by(models.Attachment.id).all()
+    for attachment_id, sha256 in missing:
+        try:
+            results = render(blobstore.blob_path(sha256), uploads.STAGING_DIR)
+        except Exception as e:
+            logger.warning("Skipping attachment %s: %s", attachment_id, e)
+            continue
+        if record(db, attachment_id, results):
+            rendered += 1
+    return rendered
+
+
+if __name__ == "__main__":
+    from Config import engine, session
+
+    parser = argparse.ArgumentParser(description="Maintain image thumbnails and previews")
+    parser.add_argument("--backfill", action="store_true", help="render variants for images that have none")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    os.makedirs(uploads.STAGING_DIR, exist_ok=True)
+    db = session()
+    try:
+        if args.backfill:
+            print(f"Rendered variants for {backfill(db)} images")
+    finally:
+        db.close()
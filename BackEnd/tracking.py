@@ -0,0 +1,131 @@
+"""Public application tracking served from one joined query and an in-process cache.
+
+Cached entries hold the serialized response body plus validators built from
+``updated_at``. The official document link is a signed download URL that
+expires at the end of the next day; that expiry is part of the ETag, so a
+client revalidating a day-old copy receives a fresh link. Repeat polls
+carrying ``If-None-Match``/``If-Modified-Since`` are answered with 304
+straight from the cache. Admin writes that change what the tracking page
+shows call ``invalidate``.
+"""
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+import models
+import downloads
+import schemas
+import serial_filter
+from cache import TTLCache
+
+CACHE_TTL_SECONDS = 30
+CACHE_MAX_ENTRIES = 10000
+LINK_BUCKET_SECONDS = 24 * 60 * 60
+
+_cache = TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+
+
+class TrackingEntry:
+    __slots__ = ("body", "etag", "last_modified", "updated_at", "bucket")
+
+    def __init__(self, body: bytes, etag: str, last_modified: str, updated_at, bucket: int):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.updated_at = updated_at
+        self.bucket = bucket
+
+
+def _link_bucket() -> int:
+    return int(time.time()) // LINK_BUCKET_SECONDS
+
+
+def invalidate(serial_number: str):
+    _cache.invalidate(serial_number)
+
+
+def _load(db: Session, serial_number: str):
+    row = db.query(
+        models.Application.serial_number,
+        models.Application.applicant_name,
+        models.Service.title,
+        models.Application.status,
+        models.Application.created_at,
+        models.Application.updated_at,
+        models.Application.admin_remarks,
+        models.Application.official_document_path,
+    ).outerjoin(
+        models.Service, models.Service.id == models.Application.service_id
+    ).filter(
+        models.Application.serial_number == serial_number
+    ).first()
+    if row is None:
+        return None
+
+    bucket = _link_bucket()
+    official_document_url = None
+    if row.official_document_path:
+        official_document_url = downloads.sign(
+            db, row.official_document_path, (bucket + 2) * LINK_BUCKET_SECONDS
+        )
+
+    body = schemas.TrackingResponse(
+        serial_number=row.serial_number,
+        applicant_name=row.applicant_name,
+        service_title=row.title or "Unknown Service",
+        status=row.status,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        admin_remarks=row.admin_remarks,
+        official_document_path=official_document_url,
+    ).model_dump_json().encode("utf-8")
+
+    # updated_at is stored as naive UTC
+    updated_at = row.updated_at.replace(tzinfo=timezone.utc)
+    etag = f'W/"{row.serial_number}-{int(updated_at.timestamp() * 1_000_000)}-{bucket}"'
+    # The signed link changes when the bucket rolls over, so the body was
+    # last modified then at the earliest; otherwise a client revalidating
+    # by date alone would keep an expired link
+    modified = updated_at
+    if official_document_url:
+        modified = max(modified, datetime.fromtimestamp(bucket * LINK_BUCKET_SECONDS, timezone.utc))
+    # HTTP dates have one-second resolution
+    modified = modified.replace(microsecond=0)
+    return TrackingEntry(body, etag, format_datetime(modified, usegmt=True), modified, bucket)
+
+
+def _not_modified(request: Request, entry: TrackingEntry) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return entry.etag in tags or "*" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.updated_at <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def tracking_response(request: Request, db: Session, serial_number: str) -> Response:
+    entry = _cache.get(serial_number)
+    if entry is None or entry.bucket != _link_bucket():
+        if not serial_filter.might_exist(db, serial_number):
+            raise HTTPException(status_code=404, detail="Application not found")
+        entry = _load(db, serial_number)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        _cache.set(serial_number, entry)
+
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
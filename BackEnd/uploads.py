@@ -0,0 +1,102 @@
+"""Non-blocking upload storage.
+
+Upload handlers are ``async def``, so nothing in them may block the event
+loop. ``save_upload`` copies the uploaded body to disk chunk by chunk on a
+small dedicated thread pool, enforcing the per-category size limit while it
+streams and hashing as it goes. The result is a fsynced temp file in the blob
+store's staging directory; ``blobstore.register`` then renames it into its
+content-addressed home, so readers never see a partial file.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from fastapi import HTTPException, UploadFile
+
+UPLOAD_DIR = "uploads"
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+STAGING_DIR = os.path.join(BLOB_DIR, "tmp")
+CHUNK_SIZE = 1024 * 1024
+UPLOAD_IO_WORKERS = 4
+
+MAX_UPLOAD_BYTES = {
+    "documents": 25 * 1024 * 1024,
+    "complaints": 10 * 1024 * 1024,
+    "official": 25 * 1024 * 1024,
+}
+
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_IO_WORKERS, thread_name_prefix="upload-io")
+
+
+class ReceivedFile(NamedTuple):
+    tmp_path: str
+    size: int
+    sha256: str
+
+
+def safe_filename(filename: str) -> str:
+    """Drop any directory part a client put into the filename"""
+    return os.path.basename((filename or "upload").replace("\\", "/")) or "upload"
+
+
+def _open_temp(directory: str):
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    return os.fdopen(fd, "wb"), tmp_path
+
+
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _finish(out):
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+
+
+def _discard(out, tmp_path: str):
+    out.close()
+    discard(tmp_path)
+
+
+def discard(tmp_path: str):
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def run_io(func, *args):
+    """Run blocking file work on the upload thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def save_upload(file: UploadFile, category: str) -> ReceivedFile:
+    """Stream ``file`` into the staging directory without blocking the loop"""
+    limit = MAX_UPLOAD_BYTES[category]
+
+    out, tmp_path = await run_io(_open_temp, STAGING_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size is {limit // (1024 * 1024)} MB"
+                )
+            await run_io(_write_chunk, out, digest, chunk)
+        await run_io(_finish, out)
+    except BaseException:
+        await run_io(_discard, out, tmp_path)
+        raise
+
+    return ReceivedFile(tmp_path, size, digest.hexdigest())
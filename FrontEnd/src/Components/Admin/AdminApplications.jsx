@@ -42,6 +42,17 @@ export default function AdminApplications() {
     }
   };
 
+  // The list leaves out form_data; load the full application for the modal
+  const viewApplication = async (app) => {
+    setSelectedApp(app);
+    try {
+      const detail = await adminAPI.getApplication(app.id);
+      setSelectedApp((current) => (current && current.id === app.id ? detail : current));
+    } catch (err) {
+      setError(err.message || "Failed to load application");
+    }
+  };
+
   const updateStatus = async (appId, newStatus, file = null) => {
     setUpdating(true);
     try {
@@ -200,7 +211,7 @@ export default function AdminApplications() {
                       </td>
                       <td className="px-6 py-4">
                         <button
-                          onClick={() => setSelectedApp(app)}
+                          onClick={() => viewApplication(app)}
                           className="flex items-center gap-1 text-blue-600 hover:text-blue-800"
                         >
                           <FaEye /> View
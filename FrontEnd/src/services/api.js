@@ -156,6 +156,10 @@ export const complaintsAPI = {
     headers: authHeaders()
   }),
 
+  getById: (id) => fetchAPI(`/complaints/${id}`, {
+    headers: authHeaders()
+  }),
+
   uploadAttachment: async (complaintId, file) => {
     const formData = new FormData();
     formData.append('file', file);
@@ -229,6 +233,10 @@ export const adminAPI = {
     });
   },
 
+  getApplication: (id) => fetchAPI(`/admin/applications/${id}`, {
+    headers: authHeaders()
+  }),
+
   updateApplicationStatus: async (id, status, file = null) => {
     if (file) {
       const formData = new FormData();
@@ -285,6 +293,10 @@ export const adminAPI = {
     });
   },
 
+  getComplaint: (id) => fetchAPI(`/admin/complaints/${id}`, {
+    headers: authHeaders()
+  }),
+
   updateComplaint: (id, status, adminResponse = null) => fetchAPI(`/admin/complaints/${id}`, {
     method: 'PUT',
     headers: authHeaders(),